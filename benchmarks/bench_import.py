@@ -0,0 +1,77 @@
+'''
+Cold-start benchmark of lib_gyc
+
+Each sample runs a fresh interpreter, so nothing is cached in sys.modules.
+    - import     : time of `import lib_gyc`
+    - first_draw : time of `import lib_gyc` + one small gplot on the Agg backend
+
+Usage
+    python benchmarks/bench_import.py              # print the results
+    python benchmarks/bench_import.py --record     # also append them to benchmarks/import_history.jsonl
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY = os.path.join(ROOT, 'benchmarks', 'import_history.jsonl')
+
+SNIPPETS = {
+    "import"    : "import lib_gyc",
+    "first_draw": "import os; os.environ['MPLBACKEND'] = 'Agg'\n"
+                  "import lib_gyc\n"
+                  "lib_gyc.gplot([0, 1], [0, 1])",
+}
+
+def time_snippet(snippet, repeat):
+    """
+    This routine returns the wall times (s) of a snippet, each run in a fresh interpreter
+    """
+    code = ("import time\n"
+            "t_start = time.perf_counter()\n"
+            + snippet + "\n"
+            "print(time.perf_counter() - t_start)")
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return times
+
+def git_commit():
+    """
+    This routine returns the current commit of the repository (None outside of git)
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, \
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help='number of fresh interpreters per benchmark')
+    parser.add_argument('--record', action='store_true', help='append the results to ' + HISTORY)
+    args = parser.parse_args()
+
+    record = {
+        "date"   : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "commit" : git_commit(),
+        "python" : sys.version.split()[0],
+        "repeat" : args.repeat,
+    }
+    for name, snippet in SNIPPETS.items():
+        times = sorted(time_snippet(snippet, args.repeat))
+        record[name] = {"min": times[0], "median": times[len(times)//2]}
+        print("{:<12s} min {:8.1f} ms   median {:8.1f} ms".format(name, 1e3*times[0], 1e3*times[len(times)//2]))
+
+    if args.record:
+        with open(HISTORY, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print("recorded in " + HISTORY)
+
+if __name__ == '__main__':
+    main()
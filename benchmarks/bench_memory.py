@@ -0,0 +1,83 @@
+'''
+Peak memory benchmark of lib_gyc on large fields
+
+Each case runs a fresh interpreter, so the peak resident memory (ru_maxrss) only belongs to that case.
+The field is built in its own type, rows by rows, then drawn by gcontour (image path) and saved as png.
+    - field : size of the field itself
+    - extra : peak memory above the interpreter with the field already built (statistics, downsampling,
+              color mapping and rendering)
+The cases are the types float64, float32 and int16 (quantized, see the setting quantization of gcontour)
+with the settings downsample None, 'mean' and 'minmax'.
+
+Usage
+    python benchmarks/bench_memory.py                  # 8192^2 fields
+    python benchmarks/bench_memory.py --quick          # 2048^2 fields
+    python benchmarks/bench_memory.py --size 4096      # other size
+'''
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZE  = 8192
+QUICK = 2048
+
+DTYPES      = ('float64', 'float32', 'int16')
+DOWNSAMPLES = (None, 'mean', 'minmax')
+
+SNIPPET = '''
+import os, sys, json, resource, tempfile
+os.environ['MPLBACKEND'] = 'Agg'
+import numpy as np
+import lib_gyc
+
+size, dtype, downsample = {size}, np.dtype('{dtype}'), {downsample!r}
+scale, offset = 1e-4, 0.0
+x   = np.linspace(0.0, 1.0, size)
+var = np.empty((size, size), dtype=dtype)
+for start in range(0, size, 256):
+    row = np.sin(8.0 * x)[None, :] * np.cos(6.0 * x[start:start+256, None])
+    var[start:start+256] = np.round((row - offset) / scale) if dtype.kind == 'i' else row
+
+settings = lib_gyc.gcontour_style()
+settings.update(image='auto', downsample=downsample, show_colorbar=True)
+if dtype.kind == 'i':
+    settings["quantization"] = (scale, offset)
+fig  = lib_gyc.gfigure(figsize=(8, 6), dpi=100)
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+lib_gyc.gcontour(x, x, var, settings, ax=fig.add_subplot())
+with tempfile.TemporaryDirectory() as directory:
+    lib_gyc.gsavefig(os.path.join(directory, 'bench'), _dpi=100, fig=fig)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"field": var.nbytes / 2**20, "base": base / 2**10, "peak": peak / 2**10}}))
+'''
+
+def measure(size, dtype, downsample):
+    """
+    This routine returns the memory (MB) of a case run in a fresh interpreter: {field, base, peak}
+    """
+    code   = SNIPPET.format(size=size, dtype=dtype, downsample=downsample)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.exit("bench_memory: the resource module (ru_maxrss) is not available on Windows")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=SIZE, help='number of points along each axis of the field')
+    parser.add_argument('--quick', action='store_true', help='fields of {0}^2 points'.format(QUICK))
+    args = parser.parse_args()
+    size = QUICK if args.quick else args.size
+
+    print("{:<10s} {:<10s} {:>10s} {:>10s} {:>10s}".format('dtype', 'downsample', 'field (MB)', 'extra (MB)', 'peak (MB)'))
+    for dtype in DTYPES:
+        for downsample in DOWNSAMPLES:
+            result = measure(size, dtype, downsample)
+            print("{:<10s} {:<10s} {:10.0f} {:10.0f} {:10.0f}".format(dtype, str(downsample), result["field"], \
+                                                                      result["peak"] - result["base"], result["peak"]), flush=True)
+
+if __name__ == '__main__':
+    main()
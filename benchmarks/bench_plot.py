@@ -0,0 +1,230 @@
+'''
+Drawing and saving benchmark of lib_gyc
+
+Each case builds its data, then times the routine followed by a full draw of the canvas (Agg backend),
+so the rasterization is included. The peak memory is measured in a separate run under tracemalloc
+(Python and numpy allocations, the buffers of the Agg renderer are not traced).
+    - gplot        : 1e3 to 1e7 points, linear and log x axis
+    - gcontour     : 128^2 to 4096^2 grids, pcolormesh (nearest, gouraud), image and contourf
+                     (gouraud meshes up to 1024^2: the triangles take about 1 kB per quad)
+    - gcontourline : 128^2 to 4096^2 grids
+    - gsavefig     : png, pdf and svg at several dpi (512^2 gouraud field and a 1e4 points curve)
+
+Usage
+    python benchmarks/bench_plot.py                          # print the results
+    python benchmarks/bench_plot.py --quick                  # small sizes only
+    python benchmarks/bench_plot.py -k gcontour              # cases whose name contains 'gcontour'
+    python benchmarks/bench_plot.py --save                   # store the results as benchmarks/plot_baseline.json
+    python benchmarks/bench_plot.py --compare                # compare with benchmarks/plot_baseline.json
+The timings depend on the machine, so no baseline is committed: save one on the machine (e.g. before a change,
+with the same --quick and -k options) and compare with it after the change.
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+ROOT     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmarks', 'plot_baseline.json')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import lib_gyc
+
+POINTS = [10**3, 10**4, 10**5, 10**6, 10**7]
+GRIDS  = [128, 512, 1024, 2048, 4096]
+QUICK  = {"points": 10**5, "grid": 512}
+GOURAUD_MAX = 1024
+
+def line_data(num):
+    x = np.linspace(1.0, 100.0, num)
+    return x, np.sin(x) + 1e-3 * np.cos(37.0 * x)
+
+def field_data(num):
+    x    = np.linspace(0.0, 1.0, num)
+    y    = np.linspace(0.0, 1.0, num)
+    x, y = np.meshgrid(x, y)
+    return x, y, np.sin(8.0 * x) * np.cos(6.0 * y)
+
+def case_gplot(num, x_scale):
+    x, y     = line_data(num)
+    settings = lib_gyc.gplot_style()
+    settings["axis"]["x_scale"] = x_scale
+    def run():
+        lib_gyc.gplot(x, y, settings)
+    return run
+
+CONTOUR_VARIANTS = {
+    "nearest" : {"image": False, "shading": 'nearest'},
+    "gouraud" : {"image": False, "shading": 'gouraud'},
+    "image"   : {"image": 'rectilinear'},
+    "contourf": {"pcolor_contourf": 1},
+}
+
+def case_gcontour(num, variant):
+    x, y, var = field_data(num)
+    settings  = lib_gyc.gcontour_style()
+    settings.update(CONTOUR_VARIANTS[variant])
+    def run():
+        lib_gyc.gcontour(x, y, var, settings)
+    return run
+
+def case_gcontourline(num):
+    x, y, var = field_data(num)
+    def run():
+        lib_gyc.gcontourline(x, y, var)
+    return run
+
+def case_gsavefig(fmt, dpi, directory):
+    x, y, var = field_data(512)
+    xl, yl    = line_data(10**4)
+    settings  = lib_gyc.gcontour_style()
+    settings.update(CONTOUR_VARIANTS["gouraud"])
+    def run():
+        lib_gyc.gcontour(x, y, var, settings)
+        lib_gyc.gplot(xl, 0.5 + 0.4 * np.sin(yl), lib_gyc.gplot_style())
+        lib_gyc.gsavefig(os.path.join(directory, 'bench'), _dpi=dpi, _format=fmt)
+    return run
+
+def build_cases(quick, directory):
+    """
+    This routine returns the benchmark cases as a dict {name: (case, arguments, draw)}
+        - case(*arguments) builds the data and returns the function to time (the data of one case are in memory at a time)
+        - draw tells if the canvas must be drawn after the run
+    """
+    points = [num for num in POINTS if not quick or num <= QUICK["points"]]
+    grids  = [num for num in GRIDS  if not quick or num <= QUICK["grid"]]
+    cases  = {}
+    for x_scale in ('linear', 'log'):
+        for num in points:
+            cases["gplot/{}/{:.0e}".format(x_scale, num)] = (case_gplot, (num, x_scale), True)
+    for variant in CONTOUR_VARIANTS:
+        for num in grids:
+            if variant == 'gouraud' and num > GOURAUD_MAX:
+                continue
+            cases["gcontour/{}/{}".format(variant, num)] = (case_gcontour, (num, variant), True)
+    for num in grids:
+        cases["gcontourline/{}".format(num)] = (case_gcontourline, (num,), True)
+    for fmt in ('png', 'pdf', 'svg'):
+        for dpi in ((100, 300) if quick else (100, 300, 600)):
+            cases["gsavefig/{}/{}".format(fmt, dpi)] = (case_gsavefig, (fmt, dpi, directory), False)
+    return cases
+
+def measure(run, draw):
+    """
+    This routine runs a case on a new figure and returns its wall time (s)
+    """
+    plt = lib_gyc.plt
+    fig = plt.figure()
+    try:
+        t_start = time.perf_counter()
+        run()
+        if draw:
+            fig.canvas.draw()
+        return time.perf_counter() - t_start
+    finally:
+        plt.close(fig)
+
+def measure_memory(run, draw):
+    """
+    This routine runs a case under tracemalloc and returns its peak of traced memory (bytes)
+    """
+    tracemalloc.start()
+    try:
+        measure(run, draw)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def git_commit():
+    """
+    This routine returns the current commit of the repository (None outside of git)
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, \
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    """
+    This routine prints the ratios to a baseline and returns the names of the cases slower than 1 + tolerance
+    """
+    slower = []
+    print("\n{:<28s} {:>10s} {:>10s} {:>8s} {:>8s}".format('case', 'base (ms)', 'now (ms)', 'time', 'memory'))
+    for name, result in results.items():
+        if name not in baseline:
+            print("{:<28s} {:>10s} {:10.1f}".format(name, '-', 1e3*result["min"]))
+            continue
+        base       = baseline[name]
+        time_ratio = result["min"] / base["min"]
+        mem_ratio  = result["peak_mb"] / base["peak_mb"] if base["peak_mb"] > 0 else float('nan')
+        flag       = '  slower' if time_ratio > 1.0 + tolerance else ''
+        print("{:<28s} {:10.1f} {:10.1f} {:7.2f}x {:7.2f}x{}".format(name, 1e3*base["min"], 1e3*result["min"], \
+                                                                   time_ratio, mem_ratio, flag))
+        if flag:
+            slower.append(name)
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs per case')
+    parser.add_argument('--quick', action='store_true', help='only the sizes up to {points:.0e} points and {grid}^2 grids'.format(**QUICK))
+    parser.add_argument('-k', dest='select', default='', help='only the cases whose name contains this string')
+    parser.add_argument('--save', action='store_true', help='store the results as ' + BASELINE)
+    parser.add_argument('--compare', action='store_true', help='compare the results with ' + BASELINE)
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file used by --save and --compare')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.baseline):
+        sys.exit("bench_plot: no baseline at {}: the timings depend on the machine, so none is committed, "
+                 "run with --save first (e.g. before the change) to store one".format(args.baseline))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cases = build_cases(args.quick, directory)
+        # warm up: import of matplotlib, fonts and caches are not part of the timings
+        measure(case_gplot(10, 'linear'), True)
+        for name, (case, arguments, draw) in cases.items():
+            if args.select not in name:
+                continue
+            run   = case(*arguments)
+            times = sorted(measure(run, draw) for _ in range(args.repeat))
+            peak  = measure_memory(run, draw)
+            results[name] = {"min": times[0], "median": times[len(times)//2], "peak_mb": peak / 2**20}
+            print("{:<28s} min {:10.1f} ms   median {:10.1f} ms   peak {:8.1f} MB".format(
+                name, 1e3*times[0], 1e3*times[len(times)//2], peak / 2**20), flush=True)
+
+    status = 0
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = compare(results, baseline["results"], args.tolerance)
+        print("\n{} of {} cases slower than the baseline ({}) by more than {:.0%}".format(
+            len(slower), len(results), baseline["commit"], args.tolerance))
+        status = 1 if slower else 0
+
+    if args.save:
+        record = {
+            "date"      : time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "commit"    : git_commit(),
+            "python"    : sys.version.split()[0],
+            "numpy"     : np.__version__,
+            "matplotlib": lib_gyc.mpl.__version__,
+            "repeat"    : args.repeat,
+            "results"   : results,
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(record, f, indent=1)
+        print("saved in " + args.baseline)
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
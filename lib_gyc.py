@@ -7,24 +7,85 @@ LastEditTime: 2023-04-07 14:48:19
 # ---------------------------------------------------------------------------- #
 #                                import library                                #
 # ---------------------------------------------------------------------------- #
+import atexit
+import contextlib
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import traceback
+import weakref
+import zipfile
 import numpy as np
-import matplotlib as mpl
-import matplotlib.ticker as ticker
-import matplotlib.colors as colors
-from matplotlib import pyplot as plt
-from matplotlib.ticker import FuncFormatter
-from matplotlib.ticker import LogLocator
-from matplotlib.ticker import NullFormatter
+
+# matplotlib (mpl, ticker, colors, plt, ...) is imported on first drawing, see _import_matplotlib
+_MATPLOTLIB_NAMES = ("mpl", "ticker", "colors", "plt", "FuncFormatter", "LogLocator", "NullFormatter", "NonUniformImage", \
+                     "LineCollection", "Line2D")
+
 # ---------------------------------------------------------------------------- #
 #                                image settings                                #
 # ---------------------------------------------------------------------------- #
-mpl.rcParams['lines.linewidth']  = 2
-mpl.rcParams['axes.linewidth']   = 1.5
-mpl.rcParams['font.size']        = 20
-mpl.rcParams['font.family']      = 'serif'
-mpl.rcParams['font.serif']       = 'Times New Roman'
-mpl.rcParams['mathtext.fontset'] = "stix"
-mpl.rcParams['axes.prop_cycle']  = mpl.cycler(color=["#D20000", "#2d2dff",'#00D200',"k","#FF00FF"])
+def image_settings():
+    """
+    This routine applies the image settings of lib_gyc to matplotlib
+        - it is called automatically before the first drawing of lib_gyc
+        - call it before creating axes by hand (e.g. plt.subplots) to get the same style on them
+    """
+    _import_matplotlib()
+    mpl.rcParams['lines.linewidth']  = 2
+    mpl.rcParams['axes.linewidth']   = 1.5
+    mpl.rcParams['font.size']        = 20
+    mpl.rcParams['font.family']      = 'serif'
+    mpl.rcParams['font.serif']       = 'Times New Roman'
+    mpl.rcParams['mathtext.fontset'] = "stix"
+    mpl.rcParams['axes.prop_cycle']  = mpl.cycler(color=["#D20000", "#2d2dff",'#00D200',"k","#FF00FF"])
+
+_MATPLOTLIB_READY = False                # matplotlib imported and image settings applied
+_IMPORT_LOCK      = threading.RLock()    # first import from concurrent threads (reentrant for image_settings)
+
+def _import_matplotlib():
+    """
+    This routine imports matplotlib and pyplot and applies the image settings on first call (thread-safe)
+    """
+    global mpl, ticker, colors, plt, FuncFormatter, LogLocator, NullFormatter, NonUniformImage, LineCollection, Line2D
+    global _MATPLOTLIB_READY
+    if _MATPLOTLIB_READY:
+        return
+    with _IMPORT_LOCK:
+        if "plt" in globals():              # ready, or being set up by this thread (image_settings)
+            return
+        import matplotlib as _mpl
+        import matplotlib.ticker as _ticker
+        import matplotlib.colors as _colors
+        from matplotlib import pyplot as _plt
+        from matplotlib.image import NonUniformImage as _NonUniformImage
+        from matplotlib.collections import LineCollection as _LineCollection
+        from matplotlib.lines import Line2D as _Line2D
+        import matplotlib.backends.backend_agg
+        import matplotlib.collections
+        import matplotlib.contour
+        import matplotlib.figure
+        import matplotlib.image
+        import matplotlib.transforms
+        import matplotlib.tri
+        mpl, ticker, colors, plt = _mpl, _ticker, _colors, _plt
+        FuncFormatter, LogLocator, NullFormatter = _ticker.FuncFormatter, _ticker.LogLocator, _ticker.NullFormatter
+        NonUniformImage, LineCollection, Line2D = _NonUniformImage, _LineCollection, _Line2D
+        image_settings()
+        _MATPLOTLIB_READY = True
+
+def __getattr__(name):
+    """
+    This routine imports matplotlib when lib_gyc.plt (or another matplotlib name) is first accessed
+    """
+    if name in _MATPLOTLIB_NAMES:
+        _import_matplotlib()
+        return globals()[name]
+    raise AttributeError("module 'lib_gyc' has no attribute '{}'".format(name))
 
 # ---------------------------------------------------------------------------- #
 #                               section: plot                                  #
@@ -37,11 +98,139 @@ def assign_value(_var, _default):
         _var = _default
     return _var
 
-def is_constant(arr, tol=1e-8):
+def is_constant(arr, tol=1e-8, stats=None):
     """
     This routine checks if an array is constant (avoid bugs when setting ticks)
+        - stats: statistics of arr already computed by data_stats (computed here if None)
+    """
+    stats = data_stats(arr) if stats is None else stats
+    if not stats["finite"]:
+        return np.allclose(arr, stats["first"], rtol=tol, atol=tol)
+    first = float(stats["first"])
+    return max(float(stats["max"]) - first, first - float(stats["min"])) <= tol + tol*abs(first)
+
+_DATA_STATS_CACHE = {}      # id(arr) -> (weak reference, fingerprint, statistics)
+_DATA_STATS_CHUNK = 1 << 16 # number of values reduced at once (fits in the CPU cache)
+_DATA_STATS_SCOPE = threading.local()    # statistics of the writable arrays of the current data_stats_scope
+
+def _data_fingerprint(arr):
+    """
+    This routine returns a cheap version of an array: buffer address, layout and a sample of values
+    """
+    sample = arr.flat[np.linspace(0, arr.size-1, 65).astype(np.intp)]
+    return (arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str, sample.tobytes())
+
+def _compute_stats(arr):
+    """
+    This routine computes min, max and finiteness of an array in a single pass over memory
+    """
+    if arr.size == 0:
+        raise ValueError("lib_gyc: cannot compute the statistics of an empty array.")
+    if arr.flags.c_contiguous:
+        # reduce chunk by chunk so that min and max read the same cached chunk
+        flat = arr.reshape(-1)
+        mins = []
+        maxs = []
+        for start in range(0, flat.size, _DATA_STATS_CHUNK):
+            chunk = flat[start:start+_DATA_STATS_CHUNK]
+            mins.append(chunk.min())
+            maxs.append(chunk.max())
+        _min = np.min(mins)
+        _max = np.max(maxs)
+    else:
+        _min = np.min(arr)
+        _max = np.max(arr)
+
+    # NaN propagates through min and max, inf shows up as min or max
+    _finite = bool(np.isfinite(_min) and np.isfinite(_max))
+    if not _finite:
+        _min = np.nanmin(arr)
+        _max = np.nanmax(arr)
+
+    stats = {
+        "min"   : _min,
+        "max"   : _max,
+        "finite": _finite,
+        "first" : arr.flat[0],
+    }
+    return stats
+
+def data_stats(arr):
+    """
+    This routine returns the statistics of an array, computed in a single pass and cached
+        - min   : minimum (NaN ignored)
+        - max   : maximum (NaN ignored)
+        - finite: all the values are finite or not
+        - first : first value
+    Only read-only arrays are cached (e.g. np.memmap opened with mode 'r', or arr.flags.writeable = False),
+    keyed by the identity of the array and a cheap version of it (buffer address, layout and a sample of
+    the values): a writable array may be modified in place, so its statistics are computed at each call,
+    unless they are kept in a data_stats_scope.
+    """
+    if np.ma.isMaskedArray(arr):
+        return {"min": arr.min(), "max": arr.max(), "finite": False, "first": arr.flat[0]}
+    if not isinstance(arr, np.ndarray):
+        return _compute_stats(np.asarray(arr))
+    if arr.flags.writeable:
+        scope = getattr(_DATA_STATS_SCOPE, "cache", None)
+        if scope is None:
+            return _compute_stats(arr)
+        entry = scope.get(id(arr))
+        if entry is None or entry[0] is not arr:
+            entry = scope[id(arr)] = (arr, _compute_stats(arr))
+        return entry[1]
+
+    key         = id(arr)
+    fingerprint = _data_fingerprint(arr)
+    entry       = _DATA_STATS_CACHE.get(key)
+    if entry is not None and entry[0]() is arr and entry[1] == fingerprint:
+        return entry[2]
+
+    stats = _compute_stats(arr)
+    _DATA_STATS_CACHE[key] = (weakref.ref(arr, lambda _, key=key: _DATA_STATS_CACHE.pop(key, None)), fingerprint, stats)
+    return stats
+
+@contextlib.contextmanager
+def data_stats_scope():
+    """
+    This routine keeps the statistics of the writable arrays used in a with block, so that each array is scanned once
+        - the arrays must not be modified in place inside the block (the statistics are dropped at its end)
+        - scopes are per thread, nested scopes share the statistics of the outer one
+    ---
+    Example
+    ---
+    with data_stats_scope():               \n
+        gcontour(x, y, u, settings)        \n
+        gcontourline(x, y, u)              \n
+    """
+    if getattr(_DATA_STATS_SCOPE, "cache", None) is not None:
+        yield
+        return
+    _DATA_STATS_SCOPE.cache = {}
+    try:
+        yield
+    finally:
+        _DATA_STATS_SCOPE.cache = None
+
+def data_stats_clear(arr=None):
+    """
+    This routine drops the cached statistics of an array (all arrays if None)
+    """
+    if arr is None:
+        _DATA_STATS_CACHE.clear()
+    else:
+        _DATA_STATS_CACHE.pop(id(arr), None)
+
+def _merge_stats(stats):
+    """
+    This routine combines the statistics of several arrays (e.g. the blocks of an AMR field)
     """
-    return np.allclose(arr, arr[0], rtol=tol, atol=tol)
+    return {
+        "min"   : min(s["min"] for s in stats),
+        "max"   : max(s["max"] for s in stats),
+        "finite": all(s["finite"] for s in stats),
+        "first" : stats[0]["first"],
+    }
 
 def gplot_style(fontsize=20,lineslinewidth=2,axeslinewidth=1.5):
     """
@@ -61,6 +250,8 @@ def gplot_style(fontsize=20,lineslinewidth=2,axeslinewidth=1.5):
             "markevery"      : 1,
             "zorder"         : 1,
             "clip_on"        : True,
+            "decimate"       : None,
+            "decimate_dpi"   : 300,
         },
         "axis": {
             "xmin"            : None,
@@ -140,12 +331,12 @@ def gplot_style_r():
         - ylabelpad: 16
         - yrotation: 0
     """
-    settings                          = gplot_style()
-    settings["line_color"]            = '#D20000'
-    settings["axis_label_x_name"]     = '$x$'
-    settings["axis_label_y_name"]     = '$y$'
-    settings["axis_label_y_pad"]      = 16
-    settings["axis_label_y_rotation"] = 0
+    settings                             = gplot_style()
+    settings["line"]["color"]            = '#D20000'
+    settings["axis"]["label_x_name"]     = '$x$'
+    settings["axis"]["label_y_name"]     = '$y$'
+    settings["axis"]["label_y_pad"]      = 16
+    settings["axis"]["label_y_rotation"] = 0
     
     return settings
 
@@ -160,12 +351,12 @@ def gplot_style_b():
         - ylabelpad: 16
         - yrotation: 0
     """
-    settings                          = gplot_style()
-    settings["line_color"]            = '#2d2dff'
-    settings["axis_label_x_name"]     = '$x$'
-    settings["axis_label_y_name"]     = '$y$'
-    settings["axis_label_y_pad"]      = 16
-    settings["axis_label_y_rotation"] = 0
+    settings                             = gplot_style()
+    settings["line"]["color"]            = '#2d2dff'
+    settings["axis"]["label_x_name"]     = '$x$'
+    settings["axis"]["label_y_name"]     = '$y$'
+    settings["axis"]["label_y_pad"]      = 16
+    settings["axis"]["label_y_rotation"] = 0
     
     return settings
 
@@ -180,12 +371,12 @@ def gplot_style_g():
         - ylabelpad: 16
         - yrotation: 0
     """
-    settings              = gplot_style()
-    settings["line_color"]            = '#00D200'
-    settings["axis_label_x_name"]     = '$x$'
-    settings["axis_label_y_name"]     = '$y$'
-    settings["axis_label_y_pad"]      = 16
-    settings["axis_label_y_rotation"] = 0
+    settings                             = gplot_style()
+    settings["line"]["color"]            = '#00D200'
+    settings["axis"]["label_x_name"]     = '$x$'
+    settings["axis"]["label_y_name"]     = '$y$'
+    settings["axis"]["label_y_pad"]      = 16
+    settings["axis"]["label_y_rotation"] = 0
     
     return settings
 
@@ -230,6 +421,11 @@ def gcontour_style():
         "xtick_minor"      : None,
         "ytick_major"      : None,
         "ytick_minor"      : None,
+        "downsample"       : 'auto',
+        "downsample_dpi"   : 300,
+        "image"            : 'auto',
+        "extent"           : None,
+        "quantization"     : None,
     }
     return settings
 
@@ -241,11 +437,218 @@ def gcontourline_style():
         "levels"           : None,
         "linestyles"       : None,
         "linewidths"       : None,
-        "colors"           : None
+        "colors"           : None,
+        "engine"           : 'contour',
+        "downsample"       : None,
+        "downsample_dpi"   : 300,
     }
     return settings
 
-def gplot(x,y,gsettings=gplot_style()):
+# ---------------------------------------------------------------------------- #
+#                            section: style objects                            #
+# ---------------------------------------------------------------------------- #
+def _style_paths(defaults):
+    """
+    This routine maps the keys of a settings dictionary to slot names
+        - nested keys are joined by '_', e.g. ["line"]["color"] -> line_color
+    """
+    paths = {}
+    for key, value in defaults.items():
+        if isinstance(value, dict):
+            for sub_key in value:
+                paths[key + '_' + sub_key] = (key, sub_key)
+        else:
+            paths[key] = (key,)
+    return paths
+
+def _check_choices(*choices):
+    return lambda value: value in choices, "must be one of {}".format(choices)
+
+def _check_int(minimum):
+    return lambda value: isinstance(value, (int, np.integer)) and value >= minimum, "must be an integer >= {}".format(minimum)
+
+_GSTYLE_UNKNOWN = set()     # (class name, key path) of the unknown keys already reported
+
+def _gstyle_equal(a, b):
+    """
+    This routine compares two values of settings (arrays, e.g. levels, are compared element-wise)
+    """
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) and all(_gstyle_equal(u, v) for u, v in zip(a, b))
+    return bool(a == b)
+
+class GStyle:
+    """
+    This class is the base of the compiled settings GPlotStyle, GContourStyle and GContourLineStyle
+        - the settings are validated once and stored in slots (one per key, nested keys joined by '_')
+        - a style is read-only, derive(key=value, ...) returns a new style with some keys changed
+        - to_dict() and the constructor convert to and from the settings dictionaries
+        - missing keys take the default values, unknown keys of a settings dictionary are ignored with a warning
+          (once per key), unknown keys of derive(...) raise KeyError
+    ---
+    Example
+    ---
+    base  = GPlotStyle(gplot_style())                  \n
+    red   = base.derive(line_color='#D20000')          \n
+    gplot(x, y, red)                                   \n
+    """
+    __slots__       = ()
+    _paths          = {} # slot name -> key path in the settings dictionary
+    _sections       = {} # names of the nested sections, e.g. "line"
+    _checks         = {} # slot name -> (check, message)
+    _default_values = {} # slot name -> default value
+
+    def __init__(self, gsettings=None):
+        values = dict(self._default_values)
+        if gsettings is not None:
+            if isinstance(gsettings, GStyle):
+                gsettings = gsettings.to_dict()
+            values.update(self._flatten(gsettings))
+        self._validate(values)
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, gsettings):
+        return cls(gsettings)
+
+    @classmethod
+    def _flatten(cls, gsettings):
+        """
+        This routine converts a settings dictionary into slot values
+        """
+        values = {}
+        for key, value in gsettings.items():
+            if key in cls._sections:
+                if not isinstance(value, dict):
+                    raise TypeError("lib_gyc: settings['{}'] must be a dictionary.".format(key))
+                paths = [((key, sub_key), sub_value) for sub_key, sub_value in value.items()]
+            else:
+                paths = [((key,), value)]
+            for path, sub_value in paths:
+                name = cls._slot_name(path)
+                if name is not None:
+                    values[name] = sub_value
+        return values
+
+    @classmethod
+    def _slot_name(cls, path):
+        """
+        This routine returns the slot of a key path, or None (with a warning once per key) if the key is unknown
+        """
+        name = '_'.join(path)
+        if cls._paths.get(name) != path:
+            if (cls.__name__, path) not in _GSTYLE_UNKNOWN:
+                _GSTYLE_UNKNOWN.add((cls.__name__, path))
+                print("lib_gyc: unknown key {} in the settings of {} is ignored.".format(
+                      ''.join("['{}']".format(key) for key in path), cls.__name__))
+            return None
+        return name
+
+    @classmethod
+    def _validate(cls, values):
+        for name, value in values.items():
+            if name in cls._checks:
+                check, message = cls._checks[name]
+                if not check(value):
+                    raise ValueError("lib_gyc: {} of {} {}, got {!r}.".format(name, cls.__name__, message, value))
+
+    def derive(self, **changes):
+        """
+        This routine returns a copy of the style with some keys changed (the style itself is unchanged)
+        """
+        for name in changes:
+            if name not in self._paths:
+                raise KeyError("lib_gyc: unknown key '{}' in {}.".format(name, type(self).__name__))
+        self._validate(changes)
+        new = object.__new__(type(self))
+        for name in self.__slots__:
+            object.__setattr__(new, name, changes[name] if name in changes else getattr(self, name))
+        return new
+
+    def to_dict(self):
+        """
+        This routine converts the style into a settings dictionary
+        """
+        gsettings = {}
+        for name, path in self._paths.items():
+            value = getattr(self, name)
+            value = list(value) if isinstance(value, list) else value
+            if len(path) == 2:
+                gsettings.setdefault(path[0], {})[path[1]] = value
+            else:
+                gsettings[path[0]] = value
+        return gsettings
+
+    def __setattr__(self, name, value):
+        raise AttributeError("lib_gyc: {} is read-only, use derive({}=...) instead.".format(type(self).__name__, name))
+
+    def __reduce__(self):
+        return (type(self), (self.to_dict(),))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(_gstyle_equal(getattr(self, name), getattr(other, name)) \
+                                                  for name in self.__slots__)
+
+    def __repr__(self):
+        changed = ["{}={!r}".format(name, getattr(self, name)) for name in self.__slots__ \
+                   if not _gstyle_equal(getattr(self, name), self._default_values[name])]
+        return "{}({})".format(type(self).__name__, ', '.join(changed))
+
+def _style_class(name, defaults, checks, doc):
+    """
+    This routine creates a style class with one slot per key of the default settings
+    """
+    paths = _style_paths(defaults())
+    attrs = {
+        "__slots__": tuple(paths),
+        "__doc__"  : doc,
+        "_paths"   : paths,
+        "_sections": {path[0] for path in paths.values() if len(path) == 2},
+        "_checks"  : checks,
+    }
+    cls = type(name, (GStyle,), attrs)
+    cls._default_values = cls._flatten(defaults())
+    return cls
+
+GPlotStyle = _style_class("GPlotStyle", gplot_style, {
+        "line_decimate"   : _check_choices(None, "minmax"),
+        "axis_x_scale"    : _check_choices("linear", "log"),
+        "axis_y_scale"    : _check_choices("linear", "log"),
+        "tick_x_major_num": _check_int(2),
+        "tick_y_major_num": _check_int(2),
+        "tick_x_minor_num": _check_int(0),
+        "tick_y_minor_num": _check_int(0),
+        "tick_x_precision": _check_int(0),
+        "tick_y_precision": _check_int(0),
+        "leg_ncol"        : _check_int(1),
+    }, """
+    This class holds the compiled settings of gplot (see GStyle), e.g. GPlotStyle(gplot_style()).line_color
+    """)
+
+GContourStyle = _style_class("GContourStyle", gcontour_style, {
+        "pcolor_contourf" : _check_choices(0, 1),
+        "shading"         : _check_choices('flat', 'nearest', 'gouraud', 'auto'),
+        "bar_num_ticks"   : _check_int(2),
+        "bar_orientation" : _check_choices('vertical', 'horizontal'),
+        "downsample"      : _check_choices(None, 'auto', 'mean', 'minmax'),
+        "image"           : _check_choices(False, 'auto', 'rectilinear'),
+        "quantization"    : (lambda value: value is None or (len(value) == 2 and value[0] != 0), \
+                             "must be None or (scale_factor, add_offset) with scale_factor != 0"),
+    }, """
+    This class holds the compiled settings of gcontour (see GStyle), e.g. GContourStyle(gcontour_style()).vmin
+    """)
+
+GContourLineStyle = _style_class("GContourLineStyle", gcontourline_style, {
+        "engine"          : _check_choices('contour', 'segments'),
+        "downsample"      : _check_choices(None, 'auto'),
+    }, """
+    This class holds the compiled settings of gcontourline (see GStyle), e.g. GContourLineStyle(gcontourline_style()).levels
+    """)
+
+def gplot(x,y,gsettings=None,ax=None):
     """
     This routine plots the curve of a variable
 
@@ -264,6 +667,8 @@ def gplot(x,y,gsettings=gplot_style()):
             - [line][markevery]      : set 1 to show all markers
             - [line][zorder]         : zorder of the line (the larger the value, the upper the line)
             - [line][clip_on]        : clip the line or not
+            - [line][decimate]       : reduce the points to the pixel columns of the axis (choices: [None, "minmax"])
+            - [line][decimate_dpi]   : resolution used to count the pixel columns when decimating
         - settings for axis and x labels and y labels
             - [axis][xmin]            : range of x and y
             - [axis][xmax]            : range of x and y
@@ -326,94 +731,220 @@ def gplot(x,y,gsettings=gplot_style()):
     Example
     ---
     settings          = gplot_style() # initialize the settings \n                                          
-    settings["label"] = "label" # set the label                   \n                      
-    settings["title"] = "title" # set the title                   \n                      
+    settings["line"]["label"]  = "label" # set the label          \n                      
+    settings["title"]["name"]  = "title" # set the title          \n                      
     gplot(x,y,settings) # plot the curve                          \n                  
 
     """
 
-    # get the current figure and axis
-    fig = plt.gcf()
-    ax  = plt.gca()
-
-    # parse the dictionary (sort randomly)
-    _line_label            = gsettings["line"]["label"] # label of the line, which will be shown in the legend
-    _line_color            = gsettings["line"]["color"] # color of the line  (choices: ["k", "#D20000", "#2d2dff",'#00D200','#F97D01'])
-    _line_style            = gsettings["line"]["style"] # style of the line  (choices: ["-", "--", "-.", ":"])
-    _line_width            = gsettings["line"]["width"] # width of the line
-    _line_marker           = gsettings["line"]["marker"] # marker of the line (choices: ["o", "s", "D", "v", "^", ">", "<")
-    _line_markersize       = gsettings["line"]["markersize"] # size of the marker
-    _line_markerfacecolor  = gsettings["line"]["markerfacecolor"] # set None to show hallow markers
-    _line_markevery        = gsettings["line"]["markevery"] # set None to show all markers
-    _line_zorder           = gsettings["line"]["zorder"] # zorder of the line (the larger the value, the upper the line)
-    _line_markeredgewidth  = gsettings["line"]["markeredgewidth"] # width of the marker edge
-    _line_clip_on          = gsettings["line"]["clip_on"] # clip the line or not
-    _axis_xmin             = gsettings["axis"]["xmin"] # range of x and y
-    _axis_xmax             = gsettings["axis"]["xmax"] # range of x and y
-    _axis_ymin             = gsettings["axis"]["ymin"] # range of x and y
-    _axis_ymax             = gsettings["axis"]["ymax"] # range of x and y
-    _axis_x_scale          = gsettings["axis"]["x_scale"] # scale of the x axis (choices: ["linear", "log"])
-    _axis_y_scale          = gsettings["axis"]["y_scale"] # scale of the y axis (choices: ["linear", "log"])
-    _axis_equal_aspect     = gsettings["axis"]["equal_aspect"] # set equal aspect or not
-    _axis_label_x_name     = gsettings["axis"]["label_x_name"] # x label,    set $x$ to show x in latex
-    _axis_label_y_name     = gsettings["axis"]["label_y_name"] # y label,    set $y$ to show y in latex
-    _axis_label_x_pad      = gsettings["axis"]["label_x_pad"] # blank padding of the x label
-    _axis_label_y_pad      = gsettings["axis"]["label_y_pad"] # blank padding of the y label
-    _axis_label_x_rotation = gsettings["axis"]["label_x_rotation"] # rotation of the x label
-    _axis_label_y_rotation = gsettings["axis"]["label_y_rotation"] # rotation of the y label
-    _tick_x_major_interval = gsettings["tick"]["x_major_interval"] # interval of major ticks of x
-    _tick_y_major_interval = gsettings["tick"]["y_major_interval"] # interval of major ticks of y
-    _tick_x_minor_interval = gsettings["tick"]["x_minor_interval"] # interval of minor ticks of x
-    _tick_y_minor_interval = gsettings["tick"]["y_minor_interval"] # interval of minor ticks of y
-    _tick_x_major_num      = gsettings["tick"]["x_major_num"] # number of major ticks of x
-    _tick_y_major_num      = gsettings["tick"]["y_major_num"] # number of major ticks of y
-    _tick_x_minor_num      = gsettings["tick"]["x_minor_num"] # number of minor ticks of x
-    _tick_y_minor_num      = gsettings["tick"]["y_minor_num"] # number of minor ticks of y
-    _tick_x_precision      = gsettings["tick"]["x_precision"] # precision of the tick labels
-    _tick_y_precision      = gsettings["tick"]["y_precision"] # precision of the tick labels
-    _tick_set_x_myticks    = gsettings["tick"]["set_x_myticks"] # set user-defined x ticks (can be uneven) or not
-    _tick_set_y_myticks    = gsettings["tick"]["set_y_myticks"] # set user-defined y ticks (can be uneven) or not
-    _tick_x_myticks        = gsettings["tick"]["x_myticks"] # user-defined x ticks
-    _tick_y_myticks        = gsettings["tick"]["y_myticks"] # user-defined y ticks
-    _tick_x_myticklabels   = gsettings["tick"]["x_myticklabels"] # user-defined x tick labels
-    _tick_y_myticklabels   = gsettings["tick"]["y_myticklabels"] # user-defined y tick labels
-    _tick_major_length     = gsettings["tick"]["major_length"] # length of the major ticks
-    _tick_major_width      = gsettings["tick"]["major_width"] # width of the major ticks
-    _tick_minor_width      = gsettings["tick"]["minor_width"] # width of the minor ticks
-    _tick_minor_length     = gsettings["tick"]["minor_length"] # length of the minor ticks
-    _tick_x_labelpad       = gsettings["tick"]["x_labelpad"] # padding of the x tick labels
-    _tick_y_labelpad       = gsettings["tick"]["y_labelpad"] # padding of the y tick labels
-    _leg_on                = gsettings["leg"]["turn_on"] # show legend or not
-    _leg_location          = gsettings["leg"]["location"] # location of the legend
-    _leg_fontsize          = gsettings["leg"]["fontsize"] # fontsize of the legend
-    _leg_ncol              = gsettings["leg"]["ncol"] # number of columns of the legend
-    _leg_frameon           = gsettings["leg"]["frameon"] # show legend frame or not
-    _leg_framealpha        = gsettings["leg"]["framealpha"] # alpha of the legend frame
-    _leg_edgecolor         = gsettings["leg"]["edgecolor"] # edgecolor of the legend frame
-    _leg_fancybox          = gsettings["leg"]["fancybox"] # show fancybox or not
-    _leg_columnspacing     = gsettings["leg"]["columnspacing"] # spacing between columns
-    _title_name            = gsettings["title"]["name"] # title of the plot
-    _title_fontsize        = gsettings["title"]["fontsize"] # fontsize of the title
-    _grid_on               = gsettings["grid"]["turn_on"] # show grid or not
-    _grid_linestyle        = gsettings["grid"]["linestyle"] # linestyle of the grid
-    _grid_line_major_width = gsettings["grid"]["line_major_width"] # width of the major grid
-    _grid_line_minor_width = gsettings["grid"]["line_minor_width"] # width of the minor grid
-    _grid_linealpha        = gsettings["grid"]["linealpha"] # alpha of the grid
-    _grid_linecolor        = gsettings["grid"]["linecolor"] # linecolor of the grid
-
-    _axis_xmin             = assign_value(_axis_xmin, np.min(x))
-    _axis_xmax             = assign_value(_axis_xmax, np.max(x))
-    _axis_ymin             = assign_value(_axis_ymin, np.min(y))
-    _axis_ymax             = assign_value(_axis_ymax, np.max(y))
+    _import_matplotlib()
+    _style = gsettings if isinstance(gsettings, GPlotStyle) else GPlotStyle(gsettings)
+    # get the current figure and axis (unless an axis is given)
+    ax  = plt.gca() if ax is None else ax
+    fig = ax.figure
+    _gp0 = _gp = _gprofile_mark()
+
+    # parse the settings (sort randomly)
+    _line_label            = _style.line_label            # label of the line, which will be shown in the legend
+    _line_color            = _style.line_color            # color of the line  (choices: ["k", "#D20000", "#2d2dff",'#00D200','#F97D01'])
+    _line_style            = _style.line_style            # style of the line  (choices: ["-", "--", "-.", ":"])
+    _line_width            = _style.line_width            # width of the line
+    _line_marker           = _style.line_marker           # marker of the line (choices: ["o", "s", "D", "v", "^", ">", "<")
+    _line_markersize       = _style.line_markersize       # size of the marker
+    _line_markerfacecolor  = _style.line_markerfacecolor  # set None to show hallow markers
+    _line_markevery        = _style.line_markevery        # set None to show all markers
+    _line_zorder           = _style.line_zorder           # zorder of the line (the larger the value, the upper the line)
+    _line_markeredgewidth  = _style.line_markeredgewidth  # width of the marker edge
+    _line_clip_on          = _style.line_clip_on          # clip the line or not
+    _line_decimate         = _style.line_decimate         # decimation of the line (choices: [None, "minmax"])
+    _line_decimate_dpi     = _style.line_decimate_dpi     # resolution used to count the pixel columns
+    _axis_xmin             = _style.axis_xmin             # range of x and y
+    _axis_xmax             = _style.axis_xmax             # range of x and y
+    _axis_ymin             = _style.axis_ymin             # range of x and y
+    _axis_ymax             = _style.axis_ymax             # range of x and y
+    _axis_x_scale          = _style.axis_x_scale          # scale of the x axis (choices: ["linear", "log"])
+    _axis_y_scale          = _style.axis_y_scale          # scale of the y axis (choices: ["linear", "log"])
+
+    _x_stats               = data_stats(x)
+    _y_stats               = data_stats(y)
+    _axis_xmin             = assign_value(_axis_xmin, _x_stats["min"])
+    _axis_xmax             = assign_value(_axis_xmax, _x_stats["max"])
+    _axis_ymin             = assign_value(_axis_ymin, _y_stats["min"])
+    _axis_ymax             = assign_value(_axis_ymax, _y_stats["max"])
+    _constant              = (_axis_x_scale != "log" and _axis_y_scale != "log") and (is_constant(x, stats=_x_stats) or is_constant(y, stats=_y_stats))
+    _gp                    = _gphase(_gp, "gplot/stats")
+
+    # ------------- decimation ------------------
+    # the limits above are always computed from the full data
+    _x_draw, _y_draw = x, y
+    if _line_decimate is not None:
+        _x_draw, _y_draw, _line_markevery = decimate_line(x, y, _line_decimate, _line_decimate_dpi, \
+                                                          _axis_x_scale, _line_marker, _line_markevery, ax=ax)
+        _gp = _gphase(_gp, "gplot/decimate")
 
     # num_line = len(x)
 
     # plot line
     # for i in range(num_line):
-    ax.plot(x,y, label = _line_label, color= _line_color, linestyle = _line_style, linewidth = _line_width,\
+    _lines = ax.plot(_x_draw,_y_draw, label = _line_label, color= _line_color, linestyle = _line_style, linewidth = _line_width,\
             marker = _line_marker, markersize = _line_markersize, markerfacecolor = _line_markerfacecolor, markevery= _line_markevery,\
             markeredgewidth=_line_markeredgewidth,zorder = _line_zorder)
+    _grecord(_lines[0], "gplot", (x, y), _style)
+    _gcount("gplot/points", len(_x_draw))
+    _gp = _gphase(_gp, "gplot/artist")
                 
+    # ------------- title, axis, ticks, legend and grid ------------------
+    gplot_axis(_style, _axis_xmin, _axis_xmax, _axis_ymin, _axis_ymax, _constant, ax=ax)
+    _gphase(_gp0, "gplot")
+
+def gplot_multi(x, ys, gsettings=None, series=None, ax=None):
+    """
+    This routine plots many curves at once as a single LineCollection (e.g. ensemble members)
+
+    ---
+    Parameters
+    ---
+        - x        : 1D x shared by all the curves, or one x per curve (2D array or list of arrays)
+        - ys       : 2D array (one curve per row) or list of 1D arrays
+        - gsettings: settings of gplot, the limits, ticks, legend and grid are set once for all the curves
+        - series   : list of per-curve overrides of [line] settings (None for no overrides), e.g.
+                     [{"color": '#D20000', "label": 'member 1'}, {}, ...]
+                     keys: color, style, width, alpha, label
+    ---
+    Note
+    ---
+        - only the curves with a "label" in series are shown in the legend ([line][label] is not used)
+        - markers and per-curve zorder are not supported by LineCollection
+    ---
+    Example
+    ---
+    settings = gplot_style()                                           \n
+    gplot_multi(t, members, settings, [{"label": 'mean'}] + [{}]*499)  \n
+    """
+    _import_matplotlib()
+    _style = gsettings if isinstance(gsettings, GPlotStyle) else GPlotStyle(gsettings)
+    ax     = plt.gca() if ax is None else ax
+    _data  = (x, ys, series)                    # inputs recorded for gsavefig(_cache=True)
+
+    # curves as a list of 1D arrays (a 2D array is kept as a view)
+    ys      = [np.asarray(y) for y in ys] if isinstance(ys, (list, tuple)) else np.asarray(ys)
+    num     = len(ys)
+    shared  = not (isinstance(x, (list, tuple)) and np.ndim(x[0]) > 0) and np.ndim(x) == 1
+    xs      = [np.asarray(x)]*num if shared else [np.asarray(xi) for xi in x]
+    series  = assign_value(series, [{}]*num)
+    if len(xs) != num or len(series) != num:
+        raise ValueError("lib_gyc: x, ys and series must hold the same number of curves.")
+    if _style.line_marker not in ('', ' ', 'None', None):
+        print("lib_gyc: markers are not supported by gplot_multi, plot the curves without markers.")
+
+    # limits over all the curves (one pass per array)
+    _x_stats    = [data_stats(x)] if shared else [data_stats(xi) for xi in xs]
+    _y_stats    = [data_stats(ys)] if isinstance(ys, np.ndarray) else [data_stats(y) for y in ys]
+    _axis_xmin  = assign_value(_style.axis_xmin, min(stats["min"] for stats in _x_stats))
+    _axis_xmax  = assign_value(_style.axis_xmax, max(stats["max"] for stats in _x_stats))
+    _axis_ymin  = assign_value(_style.axis_ymin, min(stats["min"] for stats in _y_stats))
+    _axis_ymax  = assign_value(_style.axis_ymax, max(stats["max"] for stats in _y_stats))
+
+    # segments of the curves
+    if isinstance(ys, np.ndarray) and shared and ys.ndim == 2 and _style.line_decimate is None:
+        segments = np.stack((np.broadcast_to(xs[0], ys.shape), ys), axis=-1)
+    else:
+        segments = []
+        for xi, yi in zip(xs, ys):
+            if _style.line_decimate is not None:
+                xi, yi, _ = decimate_line(xi, yi, _style.line_decimate, _style.line_decimate_dpi, _style.axis_x_scale, ax=ax)
+            segments.append(np.column_stack((xi, yi)))
+
+    # per-curve styles
+    _colors     = [overrides.get("color", _style.line_color) for overrides in series]
+    _linestyles = [overrides.get("style", _style.line_style) for overrides in series]
+    _linewidths = [overrides.get("width", _style.line_width) for overrides in series]
+    _alphas     = [overrides.get("alpha", None) for overrides in series]
+    _rgba       = colors.to_rgba_array(_colors)
+    _rgba[:, 3] = [_rgba[i, 3] if alpha is None else alpha for i, alpha in enumerate(_alphas)]
+
+    collection  = LineCollection(segments, colors=_rgba, linestyles=_linestyles, \
+                                                 linewidths=_linewidths, zorder=_style.line_zorder)
+    ax.add_collection(collection, autolim=False)
+    _grecord(collection, "gplot_multi", _data, _style)
+
+    # legend entries only for the labelled curves
+    _leg_handles = [Line2D([], [], color=_rgba[i], linestyle=_linestyles[i], linewidth=_linewidths[i], \
+                                     label=overrides["label"]) for i, overrides in enumerate(series) if overrides.get("label")]
+
+    # ------------- title, axis, ticks, legend and grid ------------------
+    _constant = (_style.axis_x_scale != "log" and _style.axis_y_scale != "log") \
+                and (_axis_xmin == _axis_xmax or _axis_ymin == _axis_ymax)
+    gplot_axis(_style, _axis_xmin, _axis_xmax, _axis_ymin, _axis_ymax, _constant, leg_handles=_leg_handles, ax=ax)
+
+    return collection
+
+def gplot_axis(gsettings, xmin, xmax, ymin, ymax, constant=False, leg_handles=None, ax=None):
+    """
+    This routine sets the title, axis, ticks, legend and grid of gplot (see gplot for the settings)
+        - xmin, xmax, ymin, ymax: range of x and y
+        - constant              : x or y is constant (only used for a warning)
+        - leg_handles           : artists shown in the legend (None to use the labelled artists of the axis)
+    """
+    _import_matplotlib()
+    ax     = plt.gca() if ax is None else ax
+    _style = gsettings if isinstance(gsettings, GPlotStyle) else GPlotStyle(gsettings)
+    _gp    = _gprofile_mark()
+
+    # parse the settings (sort randomly)
+    _axis_xmin             = xmin                         # range of x and y
+    _axis_xmax             = xmax                         # range of x and y
+    _axis_ymin             = ymin                         # range of x and y
+    _axis_ymax             = ymax                         # range of x and y
+    _axis_x_scale          = _style.axis_x_scale          # scale of the x axis (choices: ["linear", "log"])
+    _axis_y_scale          = _style.axis_y_scale          # scale of the y axis (choices: ["linear", "log"])
+    _axis_equal_aspect     = _style.axis_equal_aspect     # set equal aspect or not
+    _axis_label_x_name     = _style.axis_label_x_name     # x label,    set $x$ to show x in latex
+    _axis_label_y_name     = _style.axis_label_y_name     # y label,    set $y$ to show y in latex
+    _axis_label_x_pad      = _style.axis_label_x_pad      # blank padding of the x label
+    _axis_label_y_pad      = _style.axis_label_y_pad      # blank padding of the y label
+    _axis_label_x_rotation = _style.axis_label_x_rotation # rotation of the x label
+    _axis_label_y_rotation = _style.axis_label_y_rotation # rotation of the y label
+    _tick_x_major_interval = _style.tick_x_major_interval # interval of major ticks of x
+    _tick_y_major_interval = _style.tick_y_major_interval # interval of major ticks of y
+    _tick_x_minor_interval = _style.tick_x_minor_interval # interval of minor ticks of x
+    _tick_y_minor_interval = _style.tick_y_minor_interval # interval of minor ticks of y
+    _tick_x_major_num      = _style.tick_x_major_num      # number of major ticks of x
+    _tick_y_major_num      = _style.tick_y_major_num      # number of major ticks of y
+    _tick_x_minor_num      = _style.tick_x_minor_num      # number of minor ticks of x
+    _tick_y_minor_num      = _style.tick_y_minor_num      # number of minor ticks of y
+    _tick_x_precision      = _style.tick_x_precision      # precision of the tick labels
+    _tick_y_precision      = _style.tick_y_precision      # precision of the tick labels
+    _tick_set_x_myticks    = _style.tick_set_x_myticks    # set user-defined x ticks (can be uneven) or not
+    _tick_set_y_myticks    = _style.tick_set_y_myticks    # set user-defined y ticks (can be uneven) or not
+    _tick_x_myticks        = _style.tick_x_myticks        # user-defined x ticks
+    _tick_y_myticks        = _style.tick_y_myticks        # user-defined y ticks
+    _tick_x_myticklabels   = _style.tick_x_myticklabels   # user-defined x tick labels
+    _tick_y_myticklabels   = _style.tick_y_myticklabels   # user-defined y tick labels
+    _tick_major_length     = _style.tick_major_length     # length of the major ticks
+    _tick_major_width      = _style.tick_major_width      # width of the major ticks
+    _tick_minor_width      = _style.tick_minor_width      # width of the minor ticks
+    _tick_minor_length     = _style.tick_minor_length     # length of the minor ticks
+    _tick_x_labelpad       = _style.tick_x_labelpad       # padding of the x tick labels
+    _tick_y_labelpad       = _style.tick_y_labelpad       # padding of the y tick labels
+    _leg_on                = _style.leg_turn_on           # show legend or not
+    _leg_location          = _style.leg_location          # location of the legend
+    _leg_fontsize          = _style.leg_fontsize          # fontsize of the legend
+    _leg_ncol              = _style.leg_ncol              # number of columns of the legend
+    _leg_frameon           = _style.leg_frameon           # show legend frame or not
+    _leg_framealpha        = _style.leg_framealpha        # alpha of the legend frame
+    _leg_edgecolor         = _style.leg_edgecolor         # edgecolor of the legend frame
+    _leg_fancybox          = _style.leg_fancybox          # show fancybox or not
+    _leg_columnspacing     = _style.leg_columnspacing     # spacing between columns
+    _title_name            = _style.title_name            # title of the plot
+    _title_fontsize        = _style.title_fontsize        # fontsize of the title
+    _grid_on               = _style.grid_turn_on          # show grid or not
+    _grid_linestyle        = _style.grid_linestyle        # linestyle of the grid
+    _grid_line_major_width = _style.grid_line_major_width # width of the major grid
+    _grid_line_minor_width = _style.grid_line_minor_width # width of the minor grid
+    _grid_linealpha        = _style.grid_linealpha        # alpha of the grid
+    _grid_linecolor        = _style.grid_linecolor        # linecolor of the grid
+
     # ------------- title ------------------
     ax.set_title(_title_name, fontsize=_title_fontsize)
 
@@ -426,19 +957,15 @@ def gplot(x,y,gsettings=gplot_style()):
 
     if _axis_x_scale != "log" and _axis_y_scale != "log":
         # set ticks based on the data for linear scale
-        if (is_constant(x) or is_constant(y)) and (_axis_xmin == _axis_xmax or _axis_ymin == _axis_ymax):
+        if constant and (_axis_xmin == _axis_xmax or _axis_ymin == _axis_ymax):
             print("(lib_gyc) Warning: x or y is constant. ['axis']['xmin'] and ['axis']['xmax'] should be set manually.")
             
-        _tick_x_major_interval = assign_value(_tick_x_major_interval, (_axis_xmax-_axis_xmin)/(_tick_x_major_num-1))
-        _tick_x_minor_interval = assign_value(_tick_x_minor_interval, (_axis_xmax-_axis_xmin)/(_tick_x_major_num-1)/(_tick_x_minor_num+1))
-        _tick_y_major_interval = assign_value(_tick_y_major_interval, (_axis_ymax-_axis_ymin)/(_tick_y_major_num-1))
-        _tick_y_minor_interval = assign_value(_tick_y_minor_interval, (_axis_ymax-_axis_ymin)/(_tick_y_major_num-1)/(_tick_y_minor_num+1))
-        ax.xaxis.set_major_locator(ticker.MultipleLocator(_tick_x_major_interval))
-        ax.xaxis.set_minor_locator(ticker.MultipleLocator(_tick_x_minor_interval))
-        ax.yaxis.set_major_locator(ticker.MultipleLocator(_tick_y_major_interval)) 
-        ax.yaxis.set_minor_locator(ticker.MultipleLocator(_tick_y_minor_interval))
-        format_decimal_x(precision=_tick_x_precision)
-        format_decimal_y(precision=_tick_y_precision)
+        set_multiple_locator(ax.xaxis, _axis_xmin, _axis_xmax, _tick_x_major_num, _tick_x_minor_num, \
+                             _tick_x_major_interval, _tick_x_minor_interval)
+        set_multiple_locator(ax.yaxis, _axis_ymin, _axis_ymax, _tick_y_major_num, _tick_y_minor_num, \
+                             _tick_y_major_interval, _tick_y_minor_interval)
+        format_decimal_x(precision=_tick_x_precision, ax=ax)
+        format_decimal_y(precision=_tick_y_precision, ax=ax)
 
     elif _axis_x_scale == "log" and _axis_y_scale == "log":
         print("lib_gyc: using log scale, make sure xmin or ymin does not start from zero.")
@@ -508,12 +1035,15 @@ def gplot(x,y,gsettings=gplot_style()):
     ax.tick_params(axis='both', which='minor', length=_tick_minor_length, width = _tick_minor_width)
     ax.tick_params(axis='x', pad=_tick_x_labelpad)
     ax.tick_params(axis='y', pad=_tick_y_labelpad)
+    _gp = _gphase(_gp, "gplot/axis")
 
     # ------------- legend ------------------
-    if _leg_on:
-        ax.legend(loc=_leg_location,fontsize=_leg_fontsize,ncol=_leg_ncol, frameon=_leg_frameon, \
-                  edgecolor=_leg_edgecolor, framealpha=_leg_framealpha, fancybox=_leg_fancybox,\
-                  columnspacing=_leg_columnspacing)
+    if _leg_on and (leg_handles is None or len(leg_handles) > 0):
+        _leg_kwargs = {} if leg_handles is None else {"handles": leg_handles}
+        legend = ax.legend(**_leg_kwargs, loc=_leg_location,fontsize=_leg_fontsize,ncol=_leg_ncol, frameon=_leg_frameon, \
+                           edgecolor=_leg_edgecolor, framealpha=_leg_framealpha, fancybox=_leg_fancybox,\
+                           columnspacing=_leg_columnspacing)
+        legend._gyc_loc = _leg_location         # the location is not returned by the legend (read by gsavefig_tiled)
 
     # ------------- grid ------------------
     if _grid_on:
@@ -521,38 +1051,126 @@ def gplot(x,y,gsettings=gplot_style()):
             linestyle=_grid_linestyle,alpha=_grid_linealpha)
         ax.grid(which='minor',axis='both',linewidth=_grid_line_minor_width,color=_grid_linecolor,\
             linestyle=_grid_linestyle,alpha=_grid_linealpha)        
+    _gphase(_gp, "gplot/legend")
+
+def set_multiple_locator(axis, vmin, vmax, major_num, minor_num, major_interval=None, minor_interval=None):
+    """
+    This routine sets the major and minor MultipleLocator of an axis (x or y)
+        - the intervals default to major_num major ticks and minor_num minor ticks between two major ticks in [vmin, vmax]
+    """
+    _import_matplotlib()
+    major_interval = assign_value(major_interval, (vmax-vmin)/(major_num-1))
+    minor_interval = assign_value(minor_interval, (vmax-vmin)/(major_num-1)/(minor_num+1))
+    axis.set_major_locator(ticker.MultipleLocator(major_interval))
+    axis.set_minor_locator(ticker.MultipleLocator(minor_interval))
+
+_DECIMAL_FORMATTERS = {}    # precision -> formatter shared by all the axes
+_DECIMAL_LABELS_MAX = 4096  # tick sets memoized per formatter (the memo is cleared beyond)
+_DecimalFormatter   = None  # subclass of ticker.Formatter, defined on first use (matplotlib is imported lazily)
+
+def _decimal_formatter_class():
+    """
+    This routine defines the tick formatter of decimal_formatter on first use
+    """
+    global _DecimalFormatter
+    if _DecimalFormatter is not None:
+        return _DecimalFormatter
+
+    class _DecimalFormatter(ticker.Formatter):
+        """
+        Tick labels with a fixed number of decimals ('0' for zero), memoized per set of tick values
+        """
+        def __init__(self, precision):
+            self.precision = precision
+            self._labels   = {}             # tick values (bytes) -> labels
+            self._template = {}             # number of ticks -> format string of all the labels
+
+        def __call__(self, x, pos=None):
+            return self.format_ticks([x])[0]
+
+        def format_ticks(self, values):
+            key    = np.asarray(values, dtype=float).tobytes()
+            labels = self._labels.get(key)
+            if labels is None:
+                if len(self._labels) >= _DECIMAL_LABELS_MAX:
+                    self._labels.clear()
+                labels = self._labels[key] = self._format(values)
+            return list(labels)
+
+        def _format(self, values):
+            # all the labels are formatted by a single call, zeros (and -0.0) are labelled '0'
+            num      = len(values)
+            template = self._template.get(num)
+            if template is None:
+                template = self._template[num] = '\0'.join(['{:.%df}' % self.precision] * num)
+            labels   = template.format(*values).split('\0') if num > 0 else []
+            return tuple('0' if value == 0.0 else label for value, label in zip(values, labels))
+
+    return _DecimalFormatter
+
+def decimal_formatter(precision=2):
+    """
+    This routine returns the tick formatter with precision decimals ('0' for zero) used by gplot
+        - one formatter is shared by all the axes with the same precision, and its labels are memoized per set of ticks
+    """
+    _import_matplotlib()
+    formatter = _DECIMAL_FORMATTERS.get(precision)
+    if formatter is None:
+        formatter = _DECIMAL_FORMATTERS[precision] = _decimal_formatter_class()(precision)
+    return formatter
 
-def format_decimal_x(precision=2):
+def format_decimal_x(precision=2, ax=None):
     """
     This routine formats the origin of the plot
     """ 
-    def tick_formatter(x, pos):
-        if x == 0.0:
-            return '0'
-        else:
-            return '{:.{}f}'.format(x,precision)
-            
-            # return '{:.2f}'.format(x)
-    ax = plt.gca()
+    _import_matplotlib()
+    ax = plt.gca() if ax is None else ax
 
-    ax.xaxis.set_major_formatter(FuncFormatter(tick_formatter))
+    ax.xaxis.set_major_formatter(decimal_formatter(precision))
 
-def format_decimal_y(precision=2):
+def format_decimal_y(precision=2, ax=None):
     """
     This routine formats the origin of the plot
     """ 
-    def tick_formatter(x, pos):
-        if x == 0.0:
-            return '0'
-        else:
-            return '{:.{}f}'.format(x,precision)
-            
-            # return '{:.2f}'.format(x)
-    ax = plt.gca()
+    _import_matplotlib()
+    ax = plt.gca() if ax is None else ax
+
+    ax.yaxis.set_major_formatter(decimal_formatter(precision))
+
+def _color_range(style, stats):
+    """
+    This routine returns the color range (vmin, vmax) of a field in its stored units
+        - vmin and vmax of the settings are physical values, converted for quantized fields (see quantization)
+        - the defaults are the min and max of the stored values
+    """
+    _q   = style.quantization
+    vmin = stats["min"] if style.vmin is None else (style.vmin if _q is None else (style.vmin - _q[1]) / _q[0])
+    vmax = stats["max"] if style.vmax is None else (style.vmax if _q is None else (style.vmax - _q[1]) / _q[0])
+    if _q is not None and _q[0] < 0 and (style.vmin is not None or style.vmax is not None):
+        vmin, vmax = min(vmin, vmax), max(vmin, vmax)
+    return vmin, vmax
+
+def _physical_range(style, stats):
+    """
+    This routine returns the color range (vmin, vmax) of a field in physical values (settings vmin and vmax of gcontour)
+    """
+    _q = style.quantization
+    vmin, vmax = _color_range(style, stats)
+    if _q is None:
+        return vmin, vmax
+    vmin, vmax = vmin * _q[0] + _q[1], vmax * _q[0] + _q[1]
+    return min(vmin, vmax), max(vmin, vmax)
 
-    ax.yaxis.set_major_formatter(FuncFormatter(tick_formatter))
+def _gcolorbar_quantized(cbar, quantization):
+    """
+    This routine labels the ticks of the colorbar of a quantized field with physical values
+    """
+    if quantization is not None:
+        scale, offset  = quantization
+        cbar.formatter = ticker.FuncFormatter(lambda value, pos: '{:g}'.format(value * scale + offset))
+        cbar.update_ticks()
 
-def gcontour(x,y,var,gsettings=gcontour_style()):
+def gcontour(x,y,var,gsettings=None,ax=None):
     """
     This routine plots the contour of a variable
             
@@ -601,91 +1219,176 @@ def gcontour(x,y,var,gsettings=gcontour_style()):
             - linecolor: color of the grid
             - linewidth: width of the grid
             - linestyle: style of the grid
+        - settings for large fields
+            - downsample: reduce the field to the pixel grid of the axis before drawing (the color range and the ticks
+                          still come from the full field)
+                          'auto'  : out-of-core fields only, by block means
+                          'mean'  : every field larger than the pixel grid, by block means
+                          'minmax': every field larger than the pixel grid, keeping the block min or max (the farther
+                                    from the block mean), so that narrow extrema stay visible
+                          None    : draw all cells
+            - downsample_dpi: resolution used to count the pixels of the axis
+        - settings for structured grids
+            - image: 'auto' to draw fields on 1D coordinates as an image (imshow if uniform, NonUniformImage otherwise),
+                     'rectilinear' to also draw 2D coordinates of a rectilinear grid (e.g. from np.meshgrid) as an image, False to use pcolormesh
+            - extent: [xmin, xmax, ymin, ymax] of the first and last points, used when x and y are None
+            - quantization: (scale_factor, add_offset) of a field stored as integers (value = stored*scale_factor + add_offset),
+                            drawn from the stored values without conversion; vmin, vmax and the colorbar are physical values
+        - x, y and var can be arrays, np.memmap, paths of .npy files or descriptors of raw binary files (see gload_field)
+        - x and y can be 2D coordinates, 1D coordinates (len(x), len(y) = var.shape[1], var.shape[0]) or None (see extent)
+        - unstructured data: var holds the values on scattered points x, y (1D arrays of the same length), or x is a
+          triangulation (see gtriangulation) and y is None; the points are triangulated once and the triangulation is
+          reused by the next calls with the same points (tripcolor, or tricontourf if pcolor_contourf is 1)
+        - AMR data: var is a list of 2D blocks (coarse levels first) and x, y are the lists of their 1D coordinates
+          (centers or edges of the cells); the blocks share one color range and the layout is reused by the next calls
         ---
         Example
         ---
         settings          = gcontour_style()      # get default settings \n               
         settings["title"] = '$u=\cos(x)\cos(y)$'  # add title            \n   
         gcontour(x_2d, y_2d, z_2d, settings)      # plot the curve       \n   
+        ---
+        Return
+        ---
+        the mappable of the field (QuadMesh, AxesImage, QuadContourSet, TriMesh/PolyCollection or TriContourSet;
+        the last block for AMR data)
     """
 
-    # get the current figure and axis
-    fig = plt.gcf()
-    ax  = plt.gca()
-
-    # parse the dictionary
-    _pcolor_contourf   = gsettings["pcolor_contourf"]   # use pcolor or contourf
-    _levels            = gsettings["levels"]            # levels of the contourf
-    _alpha             = gsettings["alpha"]             # alpha of the contour
-    _xmin              = gsettings["xmin"]              # range of x
-    _xmax              = gsettings["xmax"]              # range of x
-    _ymin              = gsettings["ymin"]              # range of y
-    _ymax              = gsettings["ymax"]              # range of y
-    _cmap              = gsettings["cmap"]              # colormap
-    _shading           = gsettings["shading"]           # shading of the contour
-    _title             = gsettings["title"]             # title of the line, which will be shown in the top of the figure
-    _xlabel            = gsettings["xlabel"]            # x label: set $x$ to show x in latex
-    _ylabel            = gsettings["ylabel"]            # y label: set $y$ to show y in latex
-    _xlabelpad         = gsettings["xlabelpad"]         # labelpad of x label
-    _ylabelpad         = gsettings["ylabelpad"]         # labelpad of y label
-    _xrotation         = gsettings["xrotation"]         # angle of x label
-    _yrotation         = gsettings["yrotation"]         # angle of y label
-    _xtick_major       = gsettings["xtick_major"]       # x major tick interval
-    _xtick_minor       = gsettings["xtick_minor"]       # x minor tick interval
-    _ytick_major       = gsettings["ytick_major"]       # y major tick interval
-    _ytick_minor       = gsettings["ytick_minor"]       # y minor tick interval
-    _vmax              = gsettings["vmax"]              # max value of the colorbar
-    _vmin              = gsettings["vmin"]              # min value of the colorbar
-    _show_colorbar     = gsettings["show_colorbar"]     # show colorbar or not
-    _bar_num_ticks     = gsettings["bar_num_ticks"]     # number of ticks in the colorbar
-    _bar_label         = gsettings["bar_label"]         # label of the colorbar
-    _bar_tick_length   = gsettings["bar_tick_length"]   # length of the colorbar ticks
-    _bar_orientation   = gsettings["bar_orientation"]   # orientation of the colorbar
-    _bar_shrink        = gsettings["bar_shrink"]        # shrink the colorbar
-    _bar_position_size = gsettings["bar_position_size"] # position and size of the colorbar
-    _bar_label_pad     = gsettings["bar_label_pad"]     # position of the colorbar label
-    _antialiased       = gsettings["antialiased"]       # antialiased
-    _show_grid         = gsettings["show_grid"]         # show grid
-    _linecolor         = gsettings["linecolor"]         # edgecolor
-    _linewidth         = gsettings["linewidth"]         # linewidth
-    _linestyle         = gsettings["linestyle"]         # linestyle
-    _equal_aspect      = gsettings["equal_aspect"]      # equal aspect
-
-    # assign default values
-    _xmin              = assign_value(_xmin, np.min(x))
-    _xmax              = assign_value(_xmax, np.max(x))
-    _ymin              = assign_value(_ymin, np.min(y))
-    _ymax              = assign_value(_ymax, np.max(y))
-    _xtick_major       = assign_value(_xtick_major, (np.max(x)-np.min(x))/4) # 5 major xticks
-    _xtick_minor       = assign_value(_xtick_minor, (np.max(x)-np.min(x))/16) # 4 minor xtick between 2 major xticks
-    _ytick_major       = assign_value(_ytick_major, (np.max(y)-np.min(y))/4) # 5 major yticks
-    _ytick_minor       = assign_value(_ytick_minor, (np.max(y)-np.min(y))/16) # 4 minor ytick between 2 major yticks
-    _vmax              = assign_value(_vmax, np.max(var))
-    _vmin              = assign_value(_vmin, np.min(var))
+    _import_matplotlib()
+    _style = gsettings if isinstance(gsettings, GContourStyle) else GContourStyle(gsettings)
+    # get the current figure and axis (unless an axis is given)
+    ax  = plt.gca() if ax is None else ax
+    fig = ax.figure
+    _data = (x, y, var)                           # inputs recorded for gsavefig(_cache=True)
+    _gp0 = _gp = _gprofile_mark()
+
+    # parse the settings
+    _pcolor_contourf   = _style.pcolor_contourf   # use pcolor or contourf
+    _levels            = _style.levels            # levels of the contourf
+    _alpha             = _style.alpha             # alpha of the contour
+    _xmin              = _style.xmin              # range of x
+    _xmax              = _style.xmax              # range of x
+    _ymin              = _style.ymin              # range of y
+    _ymax              = _style.ymax              # range of y
+    _cmap              = _style.cmap              # colormap
+    _shading           = _style.shading           # shading of the contour
+    _title             = _style.title             # title of the line, which will be shown in the top of the figure
+    _xlabel            = _style.xlabel            # x label: set $x$ to show x in latex
+    _ylabel            = _style.ylabel            # y label: set $y$ to show y in latex
+    _xlabelpad         = _style.xlabelpad         # labelpad of x label
+    _ylabelpad         = _style.ylabelpad         # labelpad of y label
+    _xrotation         = _style.xrotation         # angle of x label
+    _yrotation         = _style.yrotation         # angle of y label
+    _xtick_major       = _style.xtick_major       # x major tick interval
+    _xtick_minor       = _style.xtick_minor       # x minor tick interval
+    _ytick_major       = _style.ytick_major       # y major tick interval
+    _ytick_minor       = _style.ytick_minor       # y minor tick interval
+    _vmax              = _style.vmax              # max value of the colorbar
+    _vmin              = _style.vmin              # min value of the colorbar
+    _show_colorbar     = _style.show_colorbar     # show colorbar or not
+    _bar_num_ticks     = _style.bar_num_ticks     # number of ticks in the colorbar
+    _bar_label         = _style.bar_label         # label of the colorbar
+    _bar_tick_length   = _style.bar_tick_length   # length of the colorbar ticks
+    _bar_orientation   = _style.bar_orientation   # orientation of the colorbar
+    _bar_shrink        = _style.bar_shrink        # shrink the colorbar
+    _bar_position_size = _style.bar_position_size # position and size of the colorbar
+    _bar_label_pad     = _style.bar_label_pad     # position of the colorbar label
+    _antialiased       = _style.antialiased       # antialiased
+    _show_grid         = _style.show_grid         # show grid
+    _linecolor         = _style.linecolor         # edgecolor
+    _linewidth         = _style.linewidth         # linewidth
+    _linestyle         = _style.linestyle         # linestyle
+    _equal_aspect      = _style.equal_aspect      # equal aspect
+    _downsample        = _style.downsample        # reduce the field to the pixel grid
+    _downsample_dpi    = _style.downsample_dpi    # resolution used to count the pixels
+    _image             = _style.image             # draw 1D coordinates as an image
+    _extent            = _style.extent            # extent of a uniform grid without coordinates
+
+    # open out-of-core inputs without loading them
+    x                  = gload_field(x)
+    y                  = gload_field(y)
+    var                = gload_field(var)
+
+    # scattered points (1D field) and AMR fields (list of blocks) are drawn on a cached mesh
+    _tri               = None
+    _layout            = None
+    if isinstance(var, (list, tuple)):
+        var            = [gload_field(block) for block in var]
+        _layout        = gblock_layout(x, y, [np.shape(block) for block in var])
+    elif np.ndim(var) == 1 or isinstance(x, mpl.tri.Triangulation):
+        _tri           = gtriangulation(x, y)
+
+    # uniform grid given by its extent
+    elif x is None and y is None:
+        if _extent is None:
+            raise ValueError("lib_gyc: settings['extent'] is required when x and y are None.")
+        x              = np.linspace(_extent[0], _extent[1], np.shape(var)[1])
+        y              = np.linspace(_extent[2], _extent[3], np.shape(var)[0])
+
+    # assign default values (statistics stream over out-of-core inputs chunk by chunk)
+    if _layout is not None:
+        _x_stats       = _layout["x_stats"]
+        _y_stats       = _layout["y_stats"]
+        _var_stats     = _merge_stats([data_stats(block) for block in var])
+    else:
+        _x_stats       = data_stats(x if _tri is None else _tri.x)
+        _y_stats       = data_stats(y if _tri is None else _tri.y)
+        _var_stats     = data_stats(var)
+    _xmin              = assign_value(_xmin, _x_stats["min"])
+    _xmax              = assign_value(_xmax, _x_stats["max"])
+    _ymin              = assign_value(_ymin, _y_stats["min"])
+    _ymax              = assign_value(_ymax, _y_stats["max"])
+    _xtick_major       = assign_value(_xtick_major, (_x_stats["max"]-_x_stats["min"])/4) # 5 major xticks
+    _xtick_minor       = assign_value(_xtick_minor, (_x_stats["max"]-_x_stats["min"])/16) # 4 minor xtick between 2 major xticks
+    _ytick_major       = assign_value(_ytick_major, (_y_stats["max"]-_y_stats["min"])/4) # 5 major yticks
+    _ytick_minor       = assign_value(_ytick_minor, (_y_stats["max"]-_y_stats["min"])/16) # 4 minor ytick between 2 major yticks
+    _vmin, _vmax       = _color_range(_style, _var_stats)   # in stored units for quantized fields
+    _gp                = _gphase(_gp, "gcontour/stats")
+
+    # reduce out-of-core fields to the pixel grid (limits and colors above come from the full data)
+    _grid              = _tri is None and _layout is None
+    if _grid and (_downsample in ('mean', 'minmax') or (_downsample == 'auto' and any(isinstance(arr, np.memmap) for arr in (x, y, var)))):
+        x, y, var = downsample_field(x, y, var, _downsample_dpi, method=downsample_method(_downsample), ax=ax)
     
+    # 2D coordinates of a rectilinear grid (e.g. from np.meshgrid) are drawn as 1D coordinates
+    if _grid and _image == 'rectilinear' and _pcolor_contourf == 0 and np.shape(x) == np.shape(var) and is_rectilinear(x, y):
+        x, y = x[0, :], y[:, 0]
+    _gp = _gphase(_gp, "gcontour/reduce")
+
     # plot the contour
-    if _pcolor_contourf == 1:
-        pcm = plt.contourf(x, y, var,levels=_levels,cmap=_cmap,vmax=_vmax,vmin=_vmin,antialiased=_antialiased,alpha=_alpha)
+    if _layout is not None:
+        _blocks = _gcontour_blocks(ax, _layout, var, _style, _vmin, _vmax)
+        pcm     = _blocks[-1]
+        pcm._gyc_blocks = _blocks               # the other blocks follow the clim of the last one (shared norm)
+    elif _tri is not None:
+        pcm = _gcontour_tri(ax, _tri, var, _style, _vmin, _vmax)
+        ax._sci(pcm)
+    elif _pcolor_contourf == 1:
+        pcm = ax.contourf(x, y, var,levels=_levels,cmap=_cmap,vmax=_vmax,vmin=_vmin,antialiased=_antialiased,alpha=_alpha)
+        ax._sci(pcm)
+    elif _image in ('auto', 'rectilinear') and np.ndim(x) == 1 and np.ndim(y) == 1 and (len(y), len(x)) == np.shape(var):
+        pcm = gcontour_image(x, y, var, cmap=_cmap, shading=_shading, vmin=_vmin, vmax=_vmax, alpha=_alpha, ax=ax)
     else:
-        pcm = plt.pcolormesh(x, y, var, cmap=_cmap,shading=_shading,vmax=_vmax,vmin=_vmin,\
+        pcm = ax.pcolormesh(x, y, var, cmap=_cmap,shading=_shading,vmax=_vmax,vmin=_vmin,\
                         antialiased=_antialiased,linewidth=_linewidth,alpha=_alpha)
+        pcm._gyc_antialiased = _antialiased     # not returned by get_antialiased (read by gsavefig_tiled)
+        ax._sci(pcm)
 
     pcm.set_clim(_vmin, _vmax)
+    _gcount("gcontour/quads", np.size(var) if _layout is None else sum(np.size(block) for block in var))
+    _gp = _gphase(_gp, "gcontour/artist")
     
     # ------------- label ------------------
-    plt.xlabel(_xlabel,labelpad=_xlabelpad,rotation=_xrotation)
-    plt.ylabel(_ylabel,labelpad=_ylabelpad,rotation=_yrotation)
-    plt.title(_title)
-
-    plt.xlabel(_xlabel)
-    plt.ylabel(_ylabel)
+    ax.set_xlabel(_xlabel,labelpad=_xlabelpad,rotation=_xrotation)
+    ax.set_ylabel(_ylabel,labelpad=_ylabelpad,rotation=_yrotation)
+    ax.set_title(_title)
 
     # ------------- range ------------------
-    plt.xlim([_xmin,_xmax])
-    plt.ylim([_ymin,_ymax])
+    ax.set_xlim([_xmin,_xmax])
+    ax.set_ylim([_ymin,_ymax])
 
     # ------------- ticks -------------x-----
-    plt.tick_params(direction='in',which='both')
+    ax.tick_params(direction='in',which='both')
     ax.xaxis.set_major_locator(ticker.MultipleLocator(_xtick_major)) 
     ax.xaxis.set_minor_locator(ticker.MultipleLocator(_xtick_minor))
     ax.yaxis.set_major_locator(ticker.MultipleLocator(_ytick_major)) 
@@ -693,51 +1396,2434 @@ def gcontour(x,y,var,gsettings=gcontour_style()):
 
     if _equal_aspect:
         ax.set_aspect(_equal_aspect, adjustable='box')
+    _gp = _gphase(_gp, "gcontour/axis")
 
     # ------------- colorbar ------------------
     if _show_colorbar:
-        cbar = plt.colorbar(orientation=_bar_orientation,shrink=_bar_shrink)
+        cbar = fig.colorbar(pcm,ax=ax,orientation=_bar_orientation,shrink=_bar_shrink)
         cbar.set_label(_bar_label)
         cbar.ax.tick_params(direction='in',length=_bar_tick_length)
         cbar.ax.set_position(_bar_position_size)
         cbar.set_ticks(np.linspace(_vmin,_vmax,_bar_num_ticks)) 
+        _gcolorbar_quantized(cbar, _style.quantization)
 
     # ------------- grid ------------------
     if _show_grid:
-        plt.grid(which='major',axis='both',linewidth=_linewidth,color=_linecolor,linestyle=_linestyle)
-        plt.grid(which='minor',axis='both',linewidth=_linewidth,color=_linecolor,linestyle=_linestyle)        
+        ax.grid(which='major',axis='both',linewidth=_linewidth,color=_linecolor,linestyle=_linestyle)
+        ax.grid(which='minor',axis='both',linewidth=_linewidth,color=_linecolor,linestyle=_linestyle)        
+    _gp = _gphase(_gp, "gcontour/colorbar")
+    _gphase(_gp0, "gcontour")
+    _grecord(pcm, "gcontour", _data, _style)
+
+    return pcm
+
+def is_uniform(arr, tol=1e-6):
+    """
+    This routine checks if 1D coordinates are uniformly spaced
+    """
+    step = np.diff(arr)
+    return len(step) > 0 and step[0] != 0 and np.allclose(step, step[0], rtol=tol, atol=0)
+
+def is_rectilinear(x, y, tol=1e-6):
+    """
+    This routine checks if 2D coordinates are those of a rectilinear grid (x constant along the columns, y along the rows)
+    """
+    if np.ndim(x) != 2 or np.shape(x) != np.shape(y) or 0 in np.shape(x):
+        return False
+    # the rows are compared to the first row (x) and the first column (y) by groups, without full-size temporaries
+    x_row  = np.asarray(x[0, :])
+    y_col  = np.asarray(y[:, 0])[:, None]
+    x_tol  = tol*np.ptp(x_row)
+    y_tol  = tol*np.ptp(y_col)
+    rows   = max(1, _DATA_STATS_CHUNK // x_row.size)
+    for start in range(0, len(y_col), rows):
+        if np.abs(np.asarray(x[start:start+rows]) - x_row).max() > x_tol or \
+           np.abs(np.asarray(y[start:start+rows]) - y_col[start:start+rows]).max() > y_tol:
+            return False
+    return True
+
+def _increasing_grid(x, y, var):
+    """
+    This routine flips 1D coordinates (and the field) to increasing order, as NonUniformImage needs
+    """
+    if x[-1] < x[0]:
+        x, var = x[::-1], var[:, ::-1]
+    if y[-1] < y[0]:
+        y, var = y[::-1], var[::-1, :]
+    return x, y, var
+
+def gcontour_image(x, y, var, cmap='jet', shading='gouraud', vmin=None, vmax=None, alpha=1.0, ax=None):
+    """
+    This routine draws a field on 1D coordinates as an image instead of a QuadMesh
+        - uniform coordinates are drawn by imshow, others by NonUniformImage
+        - shading 'gouraud' is drawn with bilinear interpolation, other shadings with nearest
+    """
+    _import_matplotlib()
+    ax            = plt.gca() if ax is None else ax
+    x             = np.asarray(x)
+    y             = np.asarray(y)
+    interpolation = 'bilinear' if shading == 'gouraud' else 'nearest'
+    if is_uniform(x) and is_uniform(y):
+        # the points are the centers of the pixels
+        dx  = (x[-1] - x[0]) / (len(x) - 1)
+        dy  = (y[-1] - y[0]) / (len(y) - 1)
+        im  = ax.imshow(var, origin='lower', extent=(x[0]-dx/2, x[-1]+dx/2, y[0]-dy/2, y[-1]+dy/2), \
+                        cmap=cmap, vmin=vmin, vmax=vmax, alpha=alpha, interpolation=interpolation, aspect='auto')
+    else:
+        im = NonUniformImage(ax, interpolation=interpolation, cmap=cmap, alpha=alpha)
+        im.set_data(*_increasing_grid(x, y, var))
+        im.set_clim(vmin, vmax)
+        ax.add_image(im)
+    ax._sci(im)
+    return im
+
+_GCACHE_LOCK    = threading.Lock()  # updates of the caches of meshes and contour lines from concurrent threads
+_MESH_CACHE     = {}        # (fingerprints and sums of the coordinates) -> Triangulation or block layout
+_MESH_CACHE_MAX = 16        # number of cached meshes (the oldest entry is dropped beyond)
+
+def _mesh_cached(key, build):
+    """
+    This routine returns the mesh cached under key, built by build() on a miss
+    """
+    with _GCACHE_LOCK:
+        mesh = _MESH_CACHE.pop(key, None)
+    if mesh is None:
+        mesh = build()
+    with _GCACHE_LOCK:
+        while len(_MESH_CACHE) >= _MESH_CACHE_MAX:
+            _MESH_CACHE.pop(next(iter(_MESH_CACHE)))
+        _MESH_CACHE[key] = mesh
+    return mesh
+
+def _mesh_key(kind, arrays):
+    """
+    This routine identifies coordinates by their buffers, a sample of their values and their sums
+    """
+    arrays = [np.asarray(arr) for arr in arrays]
+    return (kind,) + tuple(_data_fingerprint(arr) + (np.sum(arr, dtype=np.float64).tobytes(),) for arr in arrays)
+
+def gtriangulation(x, y, triangles=None, mask=None):
+    """
+    This routine returns the triangulation of scattered points (Delaunay) or of a mesh given by its triangles
+        - x, y     : 1D coordinates of the points
+        - triangles: (n,3) indices of the points of each triangle (None for a Delaunay triangulation)
+        - mask     : (n,) booleans of the hidden triangles
+    The triangulation is cached per coordinates, so that the fields of the next time steps reuse it
+    (gcontour, gcontour_template and gcontour_interactive call this routine, see gmesh_clear)
+    """
+    _import_matplotlib()
+    if isinstance(x, mpl.tri.Triangulation):
+        return x
+    x, y   = gload_field(x), gload_field(y)
+    arrays = [x, y] + ([] if triangles is None else [triangles]) + ([] if mask is None else [mask])
+    key    = _mesh_key(('tri', triangles is None, mask is None), arrays)
+    return _mesh_cached(key, lambda: mpl.tri.Triangulation(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), \
+                                                           triangles=triangles, mask=mask))
+
+def _block_centers(coord, num):
+    """
+    This routine returns the 1D centers of the cells of a block from its centers (num points) or edges (num+1 points)
+    """
+    coord = np.asarray(coord, dtype=np.float64)
+    if coord.ndim == 2:
+        coord = coord[0, :] if coord.shape[1] in (num, num+1) and coord.shape[0] != num else coord[:, 0]
+    if len(coord) == num + 1:
+        return (coord[1:] + coord[:-1]) / 2
+    if len(coord) != num:
+        raise ValueError("lib_gyc: the coordinates of a block must have {} (centers) or {} (edges) points, got {}.".format(num, num+1, len(coord)))
+    return coord
+
+def gblock_layout(x, y, shapes):
+    """
+    This routine returns the layout of the blocks of an AMR field (one structured block per patch)
+        - x, y  : lists of the 1D coordinates of each block, centers or edges of the cells
+                  (2D coordinates of rectilinear blocks are accepted)
+        - shapes: list of the shapes of the blocks
+    Return a dict {"x", "y": lists of the 1D centers of the blocks, "x_stats", "y_stats": min and max of the given coordinates}
+    The layout is cached per coordinates, so that the fields of the next time steps reuse it (see gmesh_clear)
+    """
+    if not (len(x) == len(y) == len(shapes)):
+        raise ValueError("lib_gyc: x, y and the blocks must have the same number of blocks.")
+    x, y   = [gload_field(arr) for arr in x], [gload_field(arr) for arr in y]
+    shapes = [tuple(shape) for shape in shapes]
+    key    = _mesh_key(('blocks', tuple(shapes)), x + y)
+
+    def build():
+        return {
+            "x"      : [_block_centers(xb, shape[1]) for xb, shape in zip(x, shapes)],
+            "y"      : [_block_centers(yb, shape[0]) for yb, shape in zip(y, shapes)],
+            "x_stats": _merge_stats([data_stats(xb) for xb in x]),
+            "y_stats": _merge_stats([data_stats(yb) for yb in y]),
+        }
+    return _mesh_cached(key, build)
+
+def gmesh_clear():
+    """
+    This routine drops the cached triangulations and block layouts of gtriangulation and gblock_layout
+    """
+    with _GCACHE_LOCK:
+        _MESH_CACHE.clear()
+
+def _gcontour_tri(ax, tri, var, style, vmin, vmax):
+    """
+    This routine draws values on the points of a triangulation: tricontourf, or tripcolor with the shading of style
+    ('gouraud' interpolates in the triangles, other shadings color each triangle by the mean of its points)
+    """
+    if style.pcolor_contourf == 1:
+        return ax.tricontourf(tri, var, levels=style.levels, cmap=style.cmap, vmin=vmin, vmax=vmax, \
+                              antialiased=style.antialiased, alpha=style.alpha)
+    return ax.tripcolor(tri, var, shading='gouraud' if style.shading == 'gouraud' else 'flat', cmap=style.cmap, \
+                        vmin=vmin, vmax=vmax, alpha=style.alpha)
+
+def _gcontour_blocks(ax, layout, blocks, style, vmin, vmax):
+    """
+    This routine draws the blocks of an AMR field in order (coarse levels first, so that finer blocks cover them)
+        - each block is drawn as an image (settings image = 'auto'), a QuadMesh or a contour set
+        - all the blocks share one color normalization, the last block is the current image (colorbar)
+    Return the list of the artists of the blocks
+    """
+    norm    = colors.Normalize(vmin, vmax)
+    levels  = contour_levels(style.levels, vmin, vmax) if style.pcolor_contourf == 1 else None
+    shading = 'gouraud' if style.shading == 'gouraud' else 'nearest'
+    artists = []
+    for xb, yb, block in zip(layout["x"], layout["y"], blocks):
+        if style.pcolor_contourf == 1:
+            artist = ax.contourf(xb, yb, block, levels=levels, cmap=style.cmap, vmin=vmin, vmax=vmax, \
+                                 antialiased=style.antialiased, alpha=style.alpha)
+        elif style.image in ('auto', 'rectilinear'):
+            artist = gcontour_image(xb, yb, block, cmap=style.cmap, shading=style.shading, vmin=vmin, vmax=vmax, \
+                                    alpha=style.alpha, ax=ax)
+        else:
+            artist = ax.pcolormesh(xb, yb, block, cmap=style.cmap, shading=shading, vmin=vmin, vmax=vmax, \
+                                   antialiased=style.antialiased, linewidth=style.linewidth, alpha=style.alpha)
+            artist._gyc_antialiased = style.antialiased
+        artist.set_norm(norm)
+        artists.append(artist)
+    ax._sci(artists[-1])
+    return artists
+
+def _gswap_artist(artist, x, y, var):
+    """
+    This routine sets a new field into a mesh, image or triangulated artist in place
+    """
+    if isinstance(artist, NonUniformImage):
+        artist.set_data(*_increasing_grid(x, y, var))
+    elif isinstance(artist, mpl.image.AxesImage):
+        artist.set_data(var)
+    elif isinstance(x, mpl.tri.Triangulation) and not isinstance(artist, mpl.collections.TriMesh):
+        artist.set_array(np.asarray(var)[x.get_masked_triangles()].mean(axis=1))   # flat tripcolor: mean of the 3 points
+    else:
+        artist.set_array(var)
 
-def gcontourline(x,y,var,gsettings=gcontourline_style()):
+def gcontourline(x,y,var,gsettings=None,ax=None):
     """
     contour line
-        -  levels     : contour levels
-        -  colors     : contour colors
-        -  linewidths : contour linewidths
-        -  linestyles : contour linestyles
+        -  levels        : contour levels (an integer n lets matplotlib choose about n+1 levels)
+        -  colors        : contour colors
+        -  linewidths    : contour linewidths
+        -  linestyles    : contour linestyles
+        -  engine        : 'contour' (plt.contour) or 'segments' (vectorized marching squares drawn as a LineCollection,
+                           the lines are cached per field and levels, see contour_segments)
+        -  downsample    : reduce the field to the pixel grid before extracting the lines (choices: [None, 'auto'])
+        -  downsample_dpi: resolution used to count the pixels
+        -  ax            : axis to draw on (None for the current axis)
+    Return the ContourSet or the LineCollection
     """
-    _levels     = gsettings['levels']
-    _colors     = gsettings['colors']
-    _linewidths = gsettings['linewidths']
-    _linestyles = gsettings['linestyles']
+    _import_matplotlib()
+    _style      = gsettings if isinstance(gsettings, GContourLineStyle) else GContourLineStyle(gsettings)
+    ax          = plt.gca() if ax is None else ax
+    _data       = (x, y, var)                   # inputs recorded for gsavefig(_cache=True)
+
+    _levels     = _style.levels
+    _colors     = _style.colors
+    _linewidths = _style.linewidths
+    _linestyles = _style.linestyles
+    _engine     = _style.engine
+    _downsample = _style.downsample
 
     _levels     = assign_value(_levels, 0)
     _colors     = assign_value(_colors, 'k')
     _linewidths = assign_value(_linewidths, 1.0)
     _linestyles = assign_value(_linestyles, 'solid')
 
-    plt.contour(x,y,var,levels=_levels,colors=_colors,\
-                linewidths=_linewidths,linestyles=_linestyles)
+    _gp = _gprofile_mark()
+    if _downsample == 'auto':
+        x, y, var = downsample_field(gload_field(x), gload_field(y), gload_field(var), _style.downsample_dpi, ax=ax)
+    if _engine == 'segments':
+        cs = _gcontourline_segments(x, y, var, _levels, _colors, _linewidths, _linestyles, ax)
+    else:
+        cs = ax.contour(x,y,var,levels=_levels,colors=_colors,\
+                        linewidths=_linewidths,linestyles=_linestyles)
+    if _gp is not None:
+        _gcount("gcontourline/points", sum(len(path.vertices) for path in cs.get_paths()))
+    _gphase(_gp, "gcontourline")
+    _grecord(cs, "gcontourline", _data, _style)
+    return cs
+
+_CONTOUR_CACHE     = {}     # (fingerprints of x, y, var, levels) -> segments of each level
+_CONTOUR_CACHE_MAX = 32     # number of cached fields and levels (the oldest entry is dropped beyond)
+
+# crossed edges of a cell for each case (bit 0: corner (i,j), 1: (i,j+1), 2: (i+1,j+1), 3: (i+1,j) above the level)
+# edges: 0 (i,j)-(i,j+1), 1 (i,j+1)-(i+1,j+1), 2 (i+1,j)-(i+1,j+1), 3 (i,j)-(i+1,j)
+# the saddles 5 and 10 are resolved by the mean of the corners, as in matplotlib
+_SADDLE_EDGES = {(5, True): ((0, 1), (2, 3)), (5, False): ((3, 0), (1, 2)),
+                 (10, True): ((3, 0), (1, 2)), (10, False): ((0, 1), (2, 3))}
+
+def contour_levels(levels, zmin, zmax):
+    """
+    This routine returns the contour levels of plt.contour: an array of levels, or an integer n (about n+1 levels chosen by MaxNLocator)
+    """
+    _import_matplotlib()
+    if not isinstance(levels, (int, np.integer)):
+        levels = np.atleast_1d(np.asarray(levels, dtype=np.float64))
+        if len(levels) > 1 and np.min(np.diff(levels)) <= 0.0:
+            raise ValueError("lib_gyc: contour levels must be increasing.")
+        return levels
+    lev   = ticker.MaxNLocator(levels + 1, min_n_ticks=1).tick_values(zmin, zmax)
+    under = np.nonzero(lev < zmin)[0]
+    over  = np.nonzero(lev > zmax)[0]
+    i0    = under[-1] if len(under) else 0
+    i1    = over[0] + 1 if len(over) else len(lev)
+    if i1 - i0 < 3:
+        i0, i1 = 0, len(lev)
+    return lev[i0:i1]
+
+def contour_segments(x, y, var, levels):
+    """
+    This routine extracts the contour lines of a field for many levels in one pass (marching squares)
+        - x, y  : 1D or 2D coordinates of the points of var
+        - var   : 2D field (cells with a NaN corner are skipped)
+        - levels: increasing 1D array of levels
+    Return the list (one per level) of arrays of shape (n,2,2) of line segments, one or two per crossed cell,
+    whose points are those of plt.contour; the result is cached per field and levels
+        - a field is identified by its buffer, a sample of its values and its sum (see contour_segments_clear)
+    """
+    x, y, var = gload_field(x), gload_field(y), gload_field(var)
+    levels    = np.asarray(levels, dtype=np.float64)
+    key       = tuple(_data_fingerprint(np.asarray(arr)) for arr in (x, y, var)) + \
+                (np.sum(var, dtype=np.float64).tobytes(), levels.tobytes())
+    with _GCACHE_LOCK:
+        segments = _CONTOUR_CACHE.pop(key, None)
+    if segments is None:
+        segments = _contour_segments(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), \
+                                     np.asarray(var, dtype=np.float64), levels)
+    with _GCACHE_LOCK:
+        while len(_CONTOUR_CACHE) >= _CONTOUR_CACHE_MAX:
+            _CONTOUR_CACHE.pop(next(iter(_CONTOUR_CACHE)))
+        _CONTOUR_CACHE[key] = segments
+    return segments
+
+def contour_segments_clear():
+    """
+    This routine drops the cached contour lines of contour_segments
+    """
+    with _GCACHE_LOCK:
+        _CONTOUR_CACHE.clear()
+
+def _contour_segments(x, y, var, levels):
+    """
+    This routine is the marching squares of contour_segments
+        - the band of every point (number of levels below it) is computed once for all the levels,
+          then only the crossed (cell, level) pairs are visited
+    """
+    ny, nx = var.shape
+    if np.ndim(x) == 1:
+        x, y = np.broadcast_to(x[None, :], (ny, nx)), np.broadcast_to(y[:, None], (ny, nx))
+    band   = np.searchsorted(levels, var, side='left')          # point above level k <=> band > k
+    band[np.isnan(var)] = -1
+    corner = (band[:-1, :-1], band[:-1, 1:], band[1:, 1:], band[1:, :-1])
+    low    = np.minimum(np.minimum(corner[0], corner[1]), np.minimum(corner[2], corner[3]))
+    high   = np.maximum(np.maximum(corner[0], corner[1]), np.maximum(corner[2], corner[3]))
+    cells  = np.flatnonzero((low < high) & (low >= 0))
+    low    = low.ravel()[cells]
+    count  = high.ravel()[cells] - low
+
+    # one row per crossed (cell, level) pair
+    cells  = np.repeat(cells, count)
+    level  = np.repeat(low - np.cumsum(count) + count, count) + np.arange(count.sum())
+    i, j   = np.divmod(cells, nx - 1)
+    rows   = (i, i, i + 1, i + 1)
+    cols   = (j, j + 1, j + 1, j)
+    z      = np.stack([var[r, c] for r, c in zip(rows, cols)], axis=1)
+    p      = np.stack([np.stack([x[r, c], y[r, c]], axis=-1) for r, c in zip(rows, cols)], axis=1)
+    lev    = levels[level]
+    above  = np.stack([band[r, c] > level for r, c in zip(rows, cols)], axis=1)
+    case   = above[:, 0] | (above[:, 1] << 1) | (above[:, 2] << 2) | (above[:, 3] << 3)
+
+    # crossing point of every edge (z0 -> z1), interpolated as in matplotlib
+    ends   = ((0, 1), (1, 2), (3, 2), (0, 3))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        point = np.stack([_crossing(p[:, e0], p[:, e1], z[:, e0], z[:, e1], lev) for e0, e1 in ends], axis=1)
+
+    # regular cells: the two crossed edges
+    crossed = np.stack([above[:, e0] != above[:, e1] for e0, e1 in ends], axis=1)
+    saddle  = (case == 5) | (case == 10)
+    regular = np.flatnonzero(~saddle)
+    edges   = np.nonzero(crossed[regular])[1].reshape(-1, 2)
+    parts   = [(regular, point[regular, edges[:, 0]], point[regular, edges[:, 1]])]
+
+    # saddle cells: two segments
+    middle  = z.mean(axis=1) > lev
+    for (code, side), pairs in _SADDLE_EDGES.items():
+        rows_s = np.flatnonzero((case == code) & (middle == side))
+        for e0, e1 in pairs:
+            parts.append((rows_s, point[rows_s, e0], point[rows_s, e1]))
+
+    pair     = np.concatenate([rows_s for rows_s, _, _ in parts])
+    segments = np.stack([np.concatenate([a for _, a, _ in parts]), np.concatenate([b for _, _, b in parts])], axis=1)
+    order    = np.argsort(level[pair], kind='stable')
+    splits   = np.searchsorted(level[pair][order], np.arange(1, len(levels)))
+    return np.split(segments[order], splits)
+
+def _crossing(p0, p1, z0, z1, level):
+    """
+    This routine interpolates the point of level on the edges p0-p1 (values z0, z1)
+    """
+    frac = ((z1 - level) / (z1 - z0))[:, None]
+    return p0 * frac + p1 * (1.0 - frac)
+
+def _gcontourline_segments(x, y, var, levels, colors, linewidths, linestyles, ax):
+    """
+    This routine draws the contour lines of contour_segments as a LineCollection, styled per level as plt.contour
+        - the segments of a level form one path, separated by NaN (one path per level, as a ContourSet)
+    """
+    x, y     = gload_field(x), gload_field(y)
+    _stats   = data_stats(gload_field(var))
+    levels   = contour_levels(levels, _stats["min"], _stats["max"])
+    segments = contour_segments(x, y, var, levels)
+    paths    = [np.concatenate([seg, np.full((len(seg), 1, 2), np.nan)], axis=1).reshape(-1, 2) for seg in segments]
+
+    # the styles cycle over the levels
+    num        = len(levels)
+    colors     = mpl.colors.to_rgba_array(colors)
+    linewidths = np.atleast_1d(linewidths)
+    linestyles = [linestyles] if isinstance(linestyles, str) else list(linestyles)
+
+    lc = LineCollection(paths, colors=colors[np.arange(num) % len(colors)], zorder=2, label='_nolegend_', \
+                        linewidths=[linewidths[k % len(linewidths)] for k in range(num)], \
+                        linestyles=[linestyles[k % len(linestyles)] for k in range(num)])
+    ax.add_collection(lc, autolim=False)
+
+    # the data limits cover the whole grid, as plt.contour
+    _x_stats = data_stats(np.asarray(x))
+    _y_stats = data_stats(np.asarray(y))
+    lc.sticky_edges.x[:] = [_x_stats["min"], _x_stats["max"]]
+    lc.sticky_edges.y[:] = [_y_stats["min"], _y_stats["max"]]
+    ax.update_datalim([(_x_stats["min"], _y_stats["min"]), (_x_stats["max"], _y_stats["max"])])
+    ax.autoscale_view(tight=True)
+    return lc
+
+def _gpanel_limits(routine, data, style):
+    """
+    This routine returns the [xmin, xmax, ymin, ymax, vmin, vmax] of the data of one panel (NaN if not applicable)
+    """
+    x, y   = gload_field(data[0]), gload_field(data[1])
+    var    = data[2] if len(data) > 2 else None
+    if isinstance(x, mpl.tri.Triangulation):
+        x, y = x.x, x.y
+    elif routine == 'gcontour' and x is None and y is None:
+        x, y = np.asarray(style.extent[:2]), np.asarray(style.extent[2:])
+    x_stats = _merge_stats([data_stats(arr) for arr in x]) if isinstance(x, (list, tuple)) else data_stats(x)
+    y_stats = _merge_stats([data_stats(arr) for arr in y]) if isinstance(y, (list, tuple)) else data_stats(y)
+    limits  = [x_stats["min"], x_stats["max"], y_stats["min"], y_stats["max"], np.nan, np.nan]
+    if var is not None:
+        var_stats  = _merge_stats([data_stats(gload_field(block)) for block in var]) if isinstance(var, (list, tuple)) \
+                     else data_stats(gload_field(var))
+        limits[4:] = var_stats["min"], var_stats["max"]
+    return limits
+
+def gpanels(routine, datasets, gsettings=None, shape=None, figsize=None, sharex=True, sharey=True, sharec=True, fig=None):
+    """
+    This routine plots a grid of panels, one dataset per panel, with shared limits, ticks and color range
+
+    ---
+    Parameters
+    ---
+        - routine  : 'gplot' (datasets of (x, y)) or 'gcontour' (datasets of (x, y, var), see gcontour)
+        - datasets : list of the data of the panels, row by row (None leaves a panel empty)
+        - gsettings: settings of the routine, shared by all the panels or one per panel (list)
+        - shape    : (rows, columns) of the grid (None for a nearly square grid)
+        - figsize  : size of the new figure in inches (None to use the default size)
+        - sharex   : all the panels share the x limits and ticks (inner tick labels are hidden)
+        - sharey   : all the panels share the y limits and ticks (inner tick labels are hidden)
+        - sharec   : gcontour panels share one color normalization and one colorbar (settings of the first panel)
+        - fig      : empty figure to draw on, e.g. from gfigure (None for a new pyplot figure of size figsize)
+    The shared limits come from the statistics of every dataset (one pass per array, cached by data_stats),
+    limits set in the settings take precedence. Each panel is drawn on its own axis (no current axis is used).
+    ---
+    Return
+    ---
+        the figure and the 2D array of the axes of the panels
+    ---
+    Example
+    ---
+    fig, axes = gpanels('gcontour', [(x, y, u_i) for u_i in u[:24]], gcontour_style(), shape=(4, 6)) \n
+    gsavefig('panels')                                                                             \n
+    """
+    _import_matplotlib()
+    if routine not in ('gplot', 'gcontour'):
+        raise ValueError("lib_gyc: routine of gpanels must be 'gplot' or 'gcontour', got {!r}.".format(routine))
+    _cls    = GPlotStyle if routine == 'gplot' else GContourStyle
+    _num    = len(datasets)
+    _styles = list(gsettings) if isinstance(gsettings, (list, tuple)) else [gsettings]*_num
+    if len(_styles) != _num:
+        raise ValueError("lib_gyc: gpanels needs one settings per dataset, got {} for {} datasets.".format(len(_styles), _num))
+    _styles = [s if isinstance(s, _cls) else _cls(s) for s in _styles]
+    if shape is None:
+        _cols = int(np.ceil(np.sqrt(_num)))
+        shape = (int(np.ceil(_num / _cols)), _cols)
+    if shape[0]*shape[1] < _num:
+        raise ValueError("lib_gyc: a grid of {}x{} panels cannot hold {} datasets.".format(shape[0], shape[1], _num))
+
+    fig  = plt.figure(figsize=figsize) if fig is None else fig
+    axes = fig.subplots(shape[0], shape[1], sharex=sharex, sharey=sharey, squeeze=False)
+
+    # the statistics of each field are computed once, for the shared limits and for its drawing
+    with data_stats_scope():
+        # limits of all the panels in one array: [xmin, xmax, ymin, ymax, vmin, vmax] per row
+        _used   = [i for i, data in enumerate(datasets) if data is not None]
+        _limits = np.array([_gpanel_limits(routine, datasets[i], _styles[i]) for i in _used], dtype=np.float64).reshape(-1, 6)
+        _lo     = np.nanmin(_limits[:, 0::2], axis=0, initial=np.inf)
+        _hi     = np.nanmax(_limits[:, 1::2], axis=0, initial=-np.inf)
+
+        mappables = []
+        for i, ax in enumerate(axes.flat):
+            if i >= _num or datasets[i] is None:
+                ax.set_axis_off()
+                continue
+            _style = _styles[i]
+            _shared = {}
+            if routine == 'gplot':
+                if sharex:
+                    _shared.update(axis_xmin=assign_value(_style.axis_xmin, _lo[0]), axis_xmax=assign_value(_style.axis_xmax, _hi[0]))
+                if sharey:
+                    _shared.update(axis_ymin=assign_value(_style.axis_ymin, _lo[1]), axis_ymax=assign_value(_style.axis_ymax, _hi[1]))
+                gplot(*datasets[i], _style.derive(**_shared) if _shared else _style, ax=ax)
+                continue
+            if sharex:
+                _shared.update(xmin=assign_value(_style.xmin, _lo[0]), xmax=assign_value(_style.xmax, _hi[0]), \
+                               xtick_major=assign_value(_style.xtick_major, (_hi[0]-_lo[0])/4), \
+                               xtick_minor=assign_value(_style.xtick_minor, (_hi[0]-_lo[0])/16))
+            if sharey:
+                _shared.update(ymin=assign_value(_style.ymin, _lo[1]), ymax=assign_value(_style.ymax, _hi[1]), \
+                               ytick_major=assign_value(_style.ytick_major, (_hi[1]-_lo[1])/4), \
+                               ytick_minor=assign_value(_style.ytick_minor, (_hi[1]-_lo[1])/16))
+            if sharec:
+                _vmin, _vmax = _physical_range(_styles[0], {"min": _lo[2], "max": _hi[2]})
+                _shared.update(vmin=_vmin, vmax=_vmax, show_colorbar=False)
+            mappables.append(gcontour(*datasets[i], _style.derive(**_shared) if _shared else _style, ax=ax))
 
-def gsavefig(_filename,_figsize=None,_dpi=300,_format='png'):
+    # labels of the shared axes only on the outer panels (the last panel of each column shows the x tick labels)
+    for i, ax in enumerate(axes.flat[:_num]):
+        if sharex and i + shape[1] < _num:
+            ax.set_xlabel('')
+        elif sharex:
+            ax.xaxis.set_tick_params(labelbottom=True)
+        if sharey and i % shape[1] != 0:
+            ax.set_ylabel('')
+
+    # ------------- one colorbar for the grid ------------------
+    if routine == 'gcontour' and sharec and mappables:
+        _style = _styles[0]
+        _vmin, _vmax = _color_range(_style, {"min": _lo[2], "max": _hi[2]})
+        norm   = colors.Normalize(_vmin, _vmax)
+        for mappable in mappables:
+            for artist in getattr(mappable, '_gyc_blocks', [mappable]):
+                artist.set_norm(norm)
+        if _style.show_colorbar:
+            cbar = fig.colorbar(mappables[-1], ax=axes.ravel().tolist(), orientation=_style.bar_orientation, shrink=_style.bar_shrink)
+            cbar.set_label(_style.bar_label)
+            cbar.ax.tick_params(direction='in', length=_style.bar_tick_length)
+            cbar.set_ticks(np.linspace(_vmin, _vmax, _style.bar_num_ticks))
+            _gcolorbar_quantized(cbar, _style.quantization)
+    return fig, axes
+
+def gfigure(figsize=None, dpi=None):
+    """
+    This routine creates a figure drawn by an Agg canvas only, never registered with pyplot
+        - the figure is freed as soon as it is no longer referenced (no plt.close needed)
+        - figures of different threads can be drawn and saved concurrently: pass the figure or its axes
+          explicitly (fig.add_subplot(), ax= of the plotting routines, fig= of gsavefig)
+    ---
+    Example
+    ---
+    fig = gfigure(figsize=(8, 6))           \n
+    ax  = fig.add_subplot()                 \n
+    gcontour(x_1d, y_1d, u, settings, ax=ax) \n
+    gsavefig('field', fig=fig)              \n
+    """
+    _import_matplotlib()
+    fig = mpl.figure.Figure(figsize=figsize, dpi=dpi)
+    mpl.backends.backend_agg.FigureCanvasAgg(fig)
+    return fig
+
+def gsavefig(_filename,_figsize=None,_dpi=300,_format='png',_cache=False,_async=False,fig=None):
     """
     This routine is used to save figure
+        - _cache: skip the rendering if the output exists and was saved from the same inputs (see gsavefig_cache_enable)
+        - _async: only rasterize the figure, the encoding and the writing run in background threads (see gsavefig_flush)
+        - fig   : figure to save (None for the current figure of pyplot)
+    The phases "gsavefig/draw" and "gsavefig/write" are recorded when profiling (see gprofile_enable)
+    Return True if the file was written, False if it was up to date, or the future of the writing if _async
     """
+    _import_matplotlib()
+    fig = plt.gcf() if fig is None else fig
     if _figsize is None:
-        _figsize = plt.gcf().get_size_inches()
+        _figsize = fig.get_size_inches()
     else:
-        plt.gcf().set_size_inches(_figsize[0],_figsize[1])
+        fig.set_size_inches(_figsize[0],_figsize[1])
 
     _filename_all = _filename + '.' + _format
+    _gp           = _gprofile_mark()
 
+    if _cache and not _gcache_enabled:
+        print("lib_gyc: gsavefig(_cache=True) needs gsavefig_cache_enable() before drawing, the figure is saved.")
+    _hash = gsavefig_hash(fig, _figsize, _dpi, _format) if _cache else None
+    if _hash is not None:
+        _gp = _gphase(_gp, "gsavefig/hash")
+        if _gcache_hit(_filename_all, _hash):
+            _gcount("gsavefig/cached", 1)
+            return False
+
+    if _async:
+        return _gsave_submit(fig, _filename_all, _dpi, _format, _hash)
+
+    # the end of the rendering splits savefig into drawing (artists, ticks, legend) and encoding/writing
+    _drawn = []
+    _cid   = fig.canvas.mpl_connect('draw_event', lambda _: _drawn.append(time.perf_counter())) if _gp is not None else None
+
+    # fig.savefig rather than plt.savefig, which redraws the whole figure once more (draw_idle) after saving
     # plt.savefig(fname=_filename_all,format=_format,dpi=_dpi,bbox_inches='tight',pad_inches=0.1)
-    plt.savefig(fname=_filename_all,format=_format,dpi=_dpi,pad_inches=0.1)
\ No newline at end of file
+    fig.savefig(fname=_filename_all,format=_format,dpi=_dpi,pad_inches=0.1)
+
+    if _hash is not None:
+        _gcache_record(_filename_all, _hash)
+    if _gp is not None:
+        fig.canvas.mpl_disconnect(_cid)
+        _gp = _gphase(_gp, "gsavefig/draw", _drawn[0] if _drawn else None)
+        _gphase(_gp, "gsavefig/write")
+        _gcount("gsavefig/bytes", os.path.getsize(_filename_all))
+    return True
+
+# ---------------------------------------------------------------------------- #
+#                              section: streaming                              #
+# ---------------------------------------------------------------------------- #
+class GStream:
+    """
+    This class is the handle of a streaming curve returned by gplot_stream
+        - append(x_new, y_new): append new samples, cost O(number of new samples)
+        - refresh()           : push the samples to the line and request a redraw of the canvas
+        - x, y                : views of the samples appended so far
+    """
+    def __init__(self, ax, line, x, y, style, capacity, headroom):
+        self.ax        = ax
+        self.line      = line
+        self.style     = style
+        self.headroom  = headroom
+        self._num      = len(x)
+        self._x        = np.empty(max(capacity, 2*self._num), dtype=np.result_type(x, np.float32))
+        self._y        = np.empty(max(capacity, 2*self._num), dtype=np.result_type(y, np.float32))
+        self._x[:self._num] = x
+        self._y[:self._num] = y
+        _x_stats       = data_stats(x)
+        _y_stats       = data_stats(y)
+        self._lim      = {"x": [_x_stats["min"], _x_stats["max"]], "y": [_y_stats["min"], _y_stats["max"]]}
+        self._dirty    = True
+        _grecord_invalidate(ax.figure)          # the samples change after drawing
+        self.refresh()
+
+    @property
+    def x(self):
+        return self._x[:self._num]
+
+    @property
+    def y(self):
+        return self._y[:self._num]
+
+    def _grow(self, num):
+        """
+        This routine doubles the buffers until they hold num samples (amortized O(1) per sample)
+        """
+        capacity = len(self._x)
+        while capacity < num:
+            capacity *= 2
+        for name in ("_x", "_y"):
+            buffer = np.empty(capacity, dtype=getattr(self, name).dtype)
+            buffer[:self._num] = getattr(self, name)[:self._num]
+            setattr(self, name, buffer)
+
+    def append(self, x_new, y_new):
+        """
+        This routine appends new samples to the curve
+            - limits and tick intervals are only updated if the new samples leave the current range
+        """
+        x_new = np.atleast_1d(x_new)
+        y_new = np.atleast_1d(y_new)
+        if len(x_new) != len(y_new):
+            raise ValueError("lib_gyc: x_new and y_new must have the same length.")
+        if len(x_new) == 0:
+            return
+        num = self._num + len(x_new)
+        if num > len(self._x):
+            self._grow(num)
+        self._x[self._num:num] = x_new
+        self._y[self._num:num] = y_new
+        self._num   = num
+        self._dirty = True
+
+        # update the limits only if the new samples are out of range (NaN are gaps: ignored, all-NaN chunks skipped)
+        for name, new in (("x", x_new), ("y", y_new)):
+            finite = new[~np.isnan(new)] if new.dtype.kind == 'f' else new
+            if len(finite) == 0:
+                continue
+            lo, hi = finite.min(), finite.max()
+            vmin, vmax = self._lim[name]
+            if lo < vmin or hi > vmax or np.isnan(vmin) or np.isnan(vmax):
+                self._update_axis(name, lo, hi)
+
+    def _update_axis(self, name, lo, hi):
+        """
+        This routine widens the range of an axis (x or y) with headroom and resets its limits and locators
+        """
+        _style      = self.style
+        _log        = getattr(_style, "axis_"+name+"_scale") == "log"
+        vmin, vmax  = self._lim[name]
+        lo, hi      = np.fmin(lo, vmin), np.fmax(hi, vmax)      # the limits are NaN if the first samples were all NaN
+        # widen the side(s) that overflowed, so that a growing series relimits O(log N) times
+        span        = np.log10(hi/lo) if _log else hi - lo
+        if lo < vmin:
+            lo = lo / 10**(self.headroom*span) if _log else lo - self.headroom*span
+        if hi > vmax:
+            hi = hi * 10**(self.headroom*span) if _log else hi + self.headroom*span
+        self._lim[name] = [lo, hi]
+
+        vmin = assign_value(getattr(_style, "axis_"+name+"min"), lo)
+        vmax = assign_value(getattr(_style, "axis_"+name+"max"), hi)
+        if getattr(_style, "axis_"+name+"min") is not None and getattr(_style, "axis_"+name+"max") is not None:
+            return
+        if name == "x":
+            self.ax.set_xlim(vmin, vmax)
+        else:
+            self.ax.set_ylim(vmin, vmax)
+        if not _log and vmax > vmin:
+            set_multiple_locator(getattr(self.ax, name+"axis"), vmin, vmax, \
+                                 getattr(_style, "tick_"+name+"_major_num"), getattr(_style, "tick_"+name+"_minor_num"), \
+                                 getattr(_style, "tick_"+name+"_major_interval"), getattr(_style, "tick_"+name+"_minor_interval"))
+
+    def refresh(self):
+        """
+        This routine pushes the samples to the line and requests a redraw of the canvas
+        """
+        if self._dirty:
+            self.line.set_data(self.x, self.y)
+            self._dirty = False
+        self.ax.get_figure().canvas.draw_idle()
+
+def gplot_stream(x, y, gsettings=None, capacity=1024, headroom=0.25, ax=None):
+    """
+    This routine plots a curve that can grow with new samples (e.g. residuals of a running solver)
+
+    ---
+    Parameters
+    ---
+        - x, y     : initial samples (at least two distinct samples are recommended to set the ticks)
+        - gsettings: settings of gplot, the axis, ticks, legend and title are set once by gplot
+        - capacity : initial size of the buffers, doubled when full
+        - headroom : fraction of the data range added to a side of the axis when the samples leave it
+        - ax       : axes to draw in (None for the current axes of pyplot)
+    ---
+    Return
+    ---
+        handle of the curve (GStream)
+    ---
+    Example
+    ---
+    stream = gplot_stream(step[:2], residual[:2], settings) \n
+    stream.append(step_new, residual_new)                    \n
+    stream.refresh()                                         \n
+    """
+    _import_matplotlib()
+    _style = gsettings if isinstance(gsettings, GPlotStyle) else GPlotStyle(gsettings)
+    x      = np.atleast_1d(np.asarray(x))
+    y      = np.atleast_1d(np.asarray(y))
+
+    # the buffers hold the full data, so decimation is not applied to streams
+    _style = _style.derive(line_decimate=None)
+    ax     = plt.gca() if ax is None else ax
+    gplot(x, y, _style, ax=ax)
+
+    return GStream(ax, ax.lines[-1], x, y, _style, capacity, headroom)
+
+# ---------------------------------------------------------------------------- #
+#                              section: templates                              #
+# ---------------------------------------------------------------------------- #
+class GContourTemplate:
+    """
+    This class is the handle of a figure template returned by gcontour_template
+        - update(var, title=None): swap a new field into the figure (only the data, clim and colorbar ticks change)
+        - save(filename, ...)    : save the current frame through gsavefig
+        - save_frames(frames, filename_pattern, ...): update and save a sequence of fields
+    """
+    def __init__(self, fig, ax, mappable, x, y, style, factors=(1, 1)):
+        self.fig      = fig
+        self.ax       = ax
+        self.mappable = mappable
+        self.style    = style
+        self._x       = x                       # coordinates of the drawn (reduced) field
+        self._y       = y
+        self._factors = factors                 # block size reducing a new field to the drawn one
+        self._blocks  = getattr(mappable, '_gyc_blocks', None)  # artists of the blocks of an AMR field
+        self._clim    = mappable.get_clim()
+        _grecord_invalidate(fig)                # the field changes after drawing
+
+    def update(self, var, title=None):
+        """
+        This routine swaps a new field (same grid) into the figure
+            - the color range follows the settings vmin/vmax or the min/max of the new field
+        """
+        _style = self.style
+        if self._blocks is not None:
+            var    = [gload_field(block) for block in var]
+            _stats = _merge_stats([data_stats(block) for block in var])
+        else:
+            var    = gload_field(var)
+            _stats = data_stats(var)
+        _vmin, _vmax = _color_range(_style, _stats)
+        if self._factors != (1, 1):
+            var = block_reduce(var, self._factors, downsample_method(self.style.downsample))
+
+        if isinstance(self.mappable, mpl.contour.ContourSet):
+            # contour sets cannot be updated in place: replace the set and its colorbar (levels follow the data)
+            if self.mappable.colorbar is not None:
+                self.mappable.colorbar.remove()
+            for artist in (self._blocks or [self.mappable]):
+                artist.remove()
+            if self._blocks is not None:
+                self._blocks  = _gcontour_blocks(self.ax, self._x, var, _style, _vmin, _vmax)
+                self.mappable = self._blocks[-1]
+            elif isinstance(self._x, mpl.tri.Triangulation):
+                self.mappable = _gcontour_tri(self.ax, self._x, var, _style, _vmin, _vmax)
+            else:
+                self.mappable = self.ax.contourf(self._x, self._y, var, levels=_style.levels, cmap=_style.cmap, vmin=_vmin, vmax=_vmax, \
+                                                 antialiased=_style.antialiased, alpha=_style.alpha)
+            self.mappable.set_clim(_vmin, _vmax)
+            if _style.show_colorbar:
+                cbar = self.fig.colorbar(self.mappable, ax=self.ax, orientation=_style.bar_orientation, shrink=_style.bar_shrink)
+                cbar.set_label(_style.bar_label)
+                cbar.ax.tick_params(direction='in', length=_style.bar_tick_length)
+                cbar.ax.set_position(_style.bar_position_size)
+                cbar.set_ticks(np.linspace(_vmin, _vmax, _style.bar_num_ticks))
+                _gcolorbar_quantized(cbar, _style.quantization)
+            self._clim = (_vmin, _vmax)
+        else:
+            self._swap(var)
+
+        if (_vmin, _vmax) != self._clim:
+            self.mappable.set_clim(_vmin, _vmax)
+            if self.mappable.colorbar is not None:
+                self.mappable.colorbar.set_ticks(np.linspace(_vmin, _vmax, _style.bar_num_ticks))
+            self._clim = (_vmin, _vmax)
+        if title is not None:
+            self.ax.set_title(title)
+
+    def _swap(self, var):
+        """
+        This routine sets the (reduced) field into the mesh or image in place (every block of an AMR field)
+        """
+        if self._blocks is not None:
+            for artist, xb, yb, block in zip(self._blocks, self._x["x"], self._x["y"], var):
+                _gswap_artist(artist, xb, yb, block)
+        else:
+            _gswap_artist(self.mappable, self._x, self._y, var)
+
+    def save(self, filename, figsize=None, dpi=300, format='png'):
+        """
+        This routine saves the current frame through gsavefig
+        """
+        gsavefig(filename, _figsize=figsize, _dpi=dpi, _format=format, fig=self.fig)
+
+    def save_frames(self, frames, filename_pattern='frame_{:05d}', figsize=None, dpi=300, format='png'):
+        """
+        This routine updates the figure with each field of frames and saves it as filename_pattern.format(index)
+        """
+        for index, var in enumerate(frames):
+            self.update(var)
+            self.save(filename_pattern.format(index), figsize=figsize, dpi=dpi, format=format)
+
+def gcontour_template(x, y, var, gsettings=None, figsize=None):
+    """
+    This routine builds a contour figure once, to render many frames that only differ by the field
+
+    ---
+    Parameters
+    ---
+        - x, y, var: grid and first field, as for gcontour
+        - gsettings: settings of gcontour (shared by all the frames)
+        - figsize  : size of the new figure in inches (None to use the default size)
+    ---
+    Return
+    ---
+        handle of the template (GContourTemplate)
+    ---
+    Example
+    ---
+    template = gcontour_template(x_1d, y_1d, u[0], settings)    \n
+    template.save_frames(u, 'movie/frame_{:05d}')             \n
+    """
+    return _gcontour_handle(GContourTemplate, x, y, var, gsettings, figsize)
+
+def _gcontour_handle(cls, x, y, var, gsettings, figsize, screen=False):
+    """
+    This routine draws a field with gcontour on a new figure and returns a handle of class cls on it
+        - out-of-core fields (and every field if screen is True) are reduced to the pixel grid before drawing,
+          the color range still follows the full field
+    """
+    _import_matplotlib()
+    _style   = gsettings if isinstance(gsettings, GContourStyle) else GContourStyle(gsettings)
+    fig      = plt.figure(figsize=figsize)
+    ax       = plt.gca()
+    var      = gload_field(var)
+    _extent  = x is None and y is None
+    if _extent:
+        x = np.linspace(_style.extent[0], _style.extent[1], np.shape(var)[1])
+        y = np.linspace(_style.extent[2], _style.extent[3], np.shape(var)[0])
+    x, y     = gload_field(x), gload_field(y)
+    if isinstance(var, (list, tuple)) or np.ndim(var) == 1 or isinstance(x, mpl.tri.Triangulation):
+        # unstructured and AMR fields are drawn at full resolution, on the mesh cached by gcontour
+        mappable = gcontour(x, y, var, _style)
+        if isinstance(var, (list, tuple)):
+            return cls(fig, ax, mappable, gblock_layout(x, y, [np.shape(gload_field(block)) for block in var]), None, _style)
+        return cls(fig, ax, mappable, gtriangulation(x, y), None, _style)
+
+    _dpi     = fig.dpi if screen else _style.downsample_dpi
+    _factors = (1, 1)
+    if _style.downsample in ('mean', 'minmax') or (_style.downsample == 'auto' and (isinstance(var, np.memmap) or screen)):
+        _factors = downsample_factors(np.shape(var), _dpi, ax=ax)
+    if _factors != (1, 1):
+        # the limits, ticks and colors of the reduced drawing come from the full data, as in gcontour
+        _x_stats = data_stats(x)
+        _y_stats = data_stats(y)
+        _vmin, _vmax = _physical_range(_style, data_stats(var))
+        _x_span  = _x_stats["max"] - _x_stats["min"]
+        _y_span  = _y_stats["max"] - _y_stats["min"]
+        _drawn   = _style.derive(xmin=assign_value(_style.xmin, _x_stats["min"]), xmax=assign_value(_style.xmax, _x_stats["max"]), \
+                                 ymin=assign_value(_style.ymin, _y_stats["min"]), ymax=assign_value(_style.ymax, _y_stats["max"]), \
+                                 xtick_major=assign_value(_style.xtick_major, _x_span/4), xtick_minor=assign_value(_style.xtick_minor, _x_span/16), \
+                                 ytick_major=assign_value(_style.ytick_major, _y_span/4), ytick_minor=assign_value(_style.ytick_minor, _y_span/16), \
+                                 vmin=_vmin, vmax=_vmax)
+        x, y, _var = downsample_field(x, y, var, _dpi, method=downsample_method(_style.downsample), ax=ax)
+        mappable = gcontour(None if _extent else x, None if _extent else y, _var, _drawn)
+    else:
+        mappable = gcontour(None if _extent else x, None if _extent else y, var, _style)
+    if isinstance(mappable, mpl.image.AxesImage) and np.ndim(x) == 2:
+        x, y = x[0, :], y[:, 0]                 # rectilinear grid drawn as an image
+    return cls(fig, ax, mappable, x, y, _style, _factors)
+
+# ---------------------------------------------------------------------------- #
+#                              section: animation                              #
+# ---------------------------------------------------------------------------- #
+_GANIMATE_PENDING = 4       # rendered frames waiting to be encoded, the rendering blocks beyond (back-pressure)
+
+class _GFFmpegSink:
+    """
+    This class pipes raw RGBA frames into an ffmpeg process
+        - the messages of ffmpeg go to a temporary file (a pipe read only at the end could fill up and block the frames)
+    """
+    def __init__(self, ffmpeg, filename, width, height, fps, codec, extra_args):
+        import subprocess
+        import tempfile
+        # yuv420p needs even sizes: the frames are padded by one pixel if needed
+        command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', '{}x{}'.format(width, height), \
+                   '-r', str(fps), '-i', '-', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', codec, '-pix_fmt', 'yuv420p'] \
+                  + list(extra_args or []) + [filename]
+        self.filename = filename
+        self.log      = tempfile.TemporaryFile()
+        self.process  = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self.log)
+
+    def write(self, frame):
+        self.process.stdin.write(frame)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        status = self.process.wait()
+        self.log.seek(0)
+        error  = self.log.read().decode(errors='replace')
+        self.log.close()
+        if status != 0:
+            raise RuntimeError("lib_gyc: ffmpeg failed to write '{}':\n{}".format(self.filename, error))
+
+class _GFrameArchive:
+    """
+    This class writes raw RGBA frames into an uncompressed .npz archive (frame_00000, frame_00001, ... and fps)
+        - the frames can be read back without loading the archive, e.g. gload_field({"path": filename, "key": 'frame_00000'})
+    """
+    def __init__(self, filename, width, height, fps):
+        self.filename = filename
+        self.shape    = (height, width, 4)
+        self.count    = 0
+        self.archive  = zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        with self.archive.open('fps.npy', 'w') as f:
+            np.lib.format.write_array(f, np.asarray(fps))
+
+    def write(self, frame):
+        with self.archive.open('frame_{:05d}.npy'.format(self.count), 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.frombuffer(frame, dtype=np.uint8).reshape(self.shape), allow_pickle=False)
+        self.count += 1
+
+    def close(self):
+        self.archive.close()
+
+def _ganimate_writer(sink, pending, errors):
+    """
+    This routine writes the queued frames into the sink until None (after an error, the frames are dropped)
+    """
+    while True:
+        frame = pending.get()
+        if frame is None:
+            return
+        if not errors:
+            try:
+                sink.write(frame)
+            except Exception:
+                errors.append(traceback.format_exc())
+
+def _ganimate_frame(item):
+    """
+    This routine splits an item of the frames of ganimate into the field and the title (None to keep the title)
+    """
+    if isinstance(item, tuple) and len(item) == 2 and (item[1] is None or isinstance(item[1], str)):
+        return item
+    return item, None
+
+def ganimate(frames, filename, x=None, y=None, gsettings=None, figsize=None, dpi=100, fps=24, codec='libx264', \
+             ffmpeg='ffmpeg', extra_args=None, verbose=True):
+    """
+    This routine renders a sequence of fields into a movie, piping the raw pixels of each frame into ffmpeg
+
+    ---
+    Parameters
+    ---
+        - frames    : iterable (e.g. generator) of fields, or of (field, title), on the same grid
+        - filename  : path of the movie (e.g. 'movie.mp4')
+        - x, y      : grid of the fields, as for gcontour
+        - gsettings : settings of gcontour, shared by all the frames (see gcontour_template)
+        - figsize   : size of the figure in inches (None to use the default size)
+        - dpi       : resolution of the frames
+        - fps       : frames per second
+        - codec     : video codec of ffmpeg
+        - ffmpeg    : ffmpeg executable; when it is not found, the frames are written into an uncompressed archive
+                      '<filename without extension>.npz' (raw RGBA frames, see _GFrameArchive)
+        - extra_args: additional output options of ffmpeg (e.g. ['-crf', '18'])
+    The frames are rendered in the calling thread and written by a background thread, so that rendering
+    frame n+1 overlaps with encoding frame n (ffmpeg runs in its own process)
+    ---
+    Return
+    ---
+        the path of the movie or of the frame archive
+    ---
+    Example
+    ---
+    ganimate((u[i] for i in range(1000)), 'movie.mp4', x_1d, y_1d, settings, dpi=150) \n
+    """
+    import queue
+    import shutil
+    _import_matplotlib()
+    frames      = iter(frames)
+    first       = next(frames, None)
+    if first is None:
+        raise ValueError("lib_gyc: ganimate needs at least one frame.")
+    var, title  = _ganimate_frame(first)
+    template    = gcontour_template(x, y, var, gsettings, figsize)
+    fig         = template.fig
+    fig.set_dpi(dpi)
+    if title is not None:
+        template.ax.set_title(title)
+    fig.canvas.draw()
+    image       = np.asarray(fig.canvas.buffer_rgba())
+    height, width = image.shape[:2]
+
+    _ffmpeg     = shutil.which(ffmpeg)
+    if _ffmpeg is not None:
+        sink = _GFFmpegSink(_ffmpeg, filename, width, height, fps, codec, extra_args)
+    else:
+        sink = _GFrameArchive(os.path.splitext(filename)[0] + '.npz', width, height, fps)
+        print("lib_gyc: ffmpeg not found, the frames are written into '{}'.".format(sink.filename))
+
+    errors  = []
+    pending = queue.Queue(_GANIMATE_PENDING)
+    writer  = threading.Thread(target=_ganimate_writer, args=(sink, pending, errors), name='ganimate', daemon=True)
+    writer.start()
+    count   = 0
+    t_start = time.perf_counter()
+    try:
+        pending.put(image.tobytes())
+        count = 1
+        for item in frames:
+            if errors:
+                break
+            var, title = _ganimate_frame(item)
+            template.update(var, title=title)
+            fig.canvas.draw()
+            pending.put(bytes(fig.canvas.buffer_rgba()))   # copy: the next draw reuses the buffer
+            count += 1
+    finally:
+        pending.put(None)
+        writer.join()
+        plt.close(fig)
+        try:
+            sink.close()
+        except RuntimeError as error:
+            errors.insert(0, str(error))        # the messages of ffmpeg explain a broken pipe
+    if errors:
+        raise RuntimeError("lib_gyc: failed to write the frames of '{}':\n{}".format(sink.filename, errors[0]))
+    if verbose:
+        print("lib_gyc: {} frames written into '{}' in {:.1f} s".format(count, sink.filename, time.perf_counter() - t_start))
+    return sink.filename
+
+# ---------------------------------------------------------------------------- #
+#                             section: interactive                             #
+# ---------------------------------------------------------------------------- #
+class GBlit:
+    """
+    This class redraws a few animated artists on top of a cached background (blitting)
+        - the background (axes, ticks, labels, legend, colorbar) is captured on every full draw of the canvas
+        - update()    : restore the background, draw the animated artists and blit the figure
+        - invalidate(): request a full draw at the next update (e.g. after the limits or ticks changed)
+    """
+    def __init__(self, fig, artists):
+        self.fig         = fig
+        self.artists     = []
+        self._background = None
+        for artist in artists:
+            self.add(artist)
+        self._cid        = fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def remove(self, artist):
+        self.artists.remove(artist)
+
+    def invalidate(self):
+        self._background = None
+
+    def _on_draw(self, event):
+        """
+        This routine captures the background after a full draw and draws the animated artists on it
+        """
+        if event is not None and event.canvas is not self.fig.canvas:
+            return
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def update(self):
+        """
+        This routine redraws the animated artists only (full draw if the background is not cached)
+        """
+        canvas = self.fig.canvas
+        if self._background is None or not canvas.supports_blit:
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            for artist in self.artists:
+                self.fig.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def save(self, filename, figsize=None, dpi=300, format='png'):
+        """
+        This routine saves the figure through gsavefig (animated artists are skipped by a normal draw)
+        """
+        for artist in self.artists:
+            artist.set_animated(False)
+        self.fig.canvas.mpl_disconnect(self._cid)
+        try:
+            gsavefig(filename, _figsize=figsize, _dpi=dpi, _format=format, fig=self.fig)
+        finally:
+            for artist in self.artists:
+                artist.set_animated(True)
+            self._cid = self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+            self.invalidate()
+
+class GPlotInteractive(GStream):
+    """
+    This class is the handle of an interactive curve returned by gplot_interactive
+        - update(x, y): replace the samples and redraw the curve only (full draw if they leave the axis range)
+        - append(x_new, y_new), refresh(): as for GStream, refresh() is blitted
+        - save(filename, ...): save the figure through gsavefig
+    """
+    def __init__(self, ax, line, x, y, style, capacity, headroom):
+        self.blit = GBlit(ax.get_figure(), [line])
+        GStream.__init__(self, ax, line, x, y, style, capacity, headroom)
+
+    def _update_axis(self, name, lo, hi):
+        GStream._update_axis(self, name, lo, hi)
+        self.blit.invalidate()
+
+    def update(self, x, y):
+        """
+        This routine replaces the samples of the curve and redraws it
+        """
+        self._num = 0
+        self.append(x, y)
+        self.refresh()
+
+    def refresh(self):
+        if self._dirty:
+            self.line.set_data(self.x, self.y)
+            self._dirty = False
+        self.blit.update()
+
+    def save(self, filename, figsize=None, dpi=300, format='png'):
+        self.blit.save(filename, figsize=figsize, dpi=dpi, format=format)
+
+def gplot_interactive(x, y, gsettings=None, headroom=0.25, ax=None):
+    """
+    This routine plots a curve whose samples can be replaced quickly (blitting), for interactive inspection
+
+    ---
+    Parameters
+    ---
+        - x, y     : initial samples
+        - gsettings: settings of gplot, the axis, ticks, legend and title are drawn once in the cached background
+        - headroom : fraction of the data range added to a side of the axis when the samples leave it
+        - ax       : axes to draw in (None for the current axes of pyplot)
+    ---
+    Return
+    ---
+        handle of the curve (GPlotInteractive)
+    ---
+    Example
+    ---
+    curve = gplot_interactive(x, u[0], settings) \n
+    for u_i in u:                                 \n
+        curve.update(x, u_i)                      \n
+    """
+    _import_matplotlib()
+    _style = gsettings if isinstance(gsettings, GPlotStyle) else GPlotStyle(gsettings)
+    x      = np.atleast_1d(np.asarray(x))
+    y      = np.atleast_1d(np.asarray(y))
+
+    _style = _style.derive(line_decimate=None)
+    ax     = plt.gca() if ax is None else ax
+    gplot(x, y, _style, ax=ax)
+
+    return GPlotInteractive(ax, ax.lines[-1], x, y, _style, len(x), headroom)
+
+class GContourInteractive(GContourTemplate):
+    """
+    This class is the handle of an interactive contour returned by gcontour_interactive
+        - update(var, rescale=False): swap a new field and redraw the field only
+            - the color range (and so the colorbar) is kept, unless rescale is True (full draw)
+            - contourf figures are always fully drawn, since their levels follow the data
+            - the field is reduced to the screen resolution (downsample = 'auto')
+        - save(filename, ...): save the figure through gsavefig (use gcontour_template for full resolution)
+    """
+    def __init__(self, fig, ax, mappable, x, y, style, factors=(1, 1)):
+        GContourTemplate.__init__(self, fig, ax, mappable, x, y, style, factors)
+        self.blit = GBlit(fig, self._blocks or [mappable])
+
+    def update(self, var, rescale=False, title=None):
+        if rescale or title is not None or isinstance(self.mappable, mpl.contour.ContourSet):
+            artists = self._blocks or [self.mappable]
+            GContourTemplate.update(self, var, title=title)
+            if (self._blocks or [self.mappable]) != artists:
+                for artist in artists:
+                    self.blit.remove(artist)
+                for artist in (self._blocks or [self.mappable]):
+                    self.blit.add(artist)
+            self.blit.invalidate()
+        else:
+            var = [gload_field(block) for block in var] if self._blocks is not None else gload_field(var)
+            if self._factors != (1, 1):
+                var = block_reduce(var, self._factors, downsample_method(self.style.downsample))
+            self._swap(var)
+        self.blit.update()
+
+    def save(self, filename, figsize=None, dpi=300, format='png'):
+        self.blit.save(filename, figsize=figsize, dpi=dpi, format=format)
+
+def gcontour_interactive(x, y, var, gsettings=None, figsize=None):
+    """
+    This routine plots a field that can be replaced quickly (blitting), for interactive inspection
+
+    ---
+    Parameters
+    ---
+        - x, y, var: grid and first field, as for gcontour
+        - gsettings: settings of gcontour, the axis, ticks and colorbar are drawn once in the cached background
+        - figsize  : size of the new figure in inches (None to use the default size)
+    ---
+    Return
+    ---
+        handle of the field (GContourInteractive)
+    ---
+    Example
+    ---
+    field = gcontour_interactive(x_1d, y_1d, u[0], settings) \n
+    for u_i in u:                                             \n
+        field.update(u_i)                                     \n
+    """
+    return _gcontour_handle(GContourInteractive, x, y, var, gsettings, figsize, screen=True)
+
+# ---------------------------------------------------------------------------- #
+#                           section: data reduction                            #
+# ---------------------------------------------------------------------------- #
+def decimate_minmax(x, y, num_buckets, x_scale='linear'):
+    """
+    This routine selects the points of a curve to draw with min/max decimation
+        - the curve is split into num_buckets buckets (one per pixel column)
+        - the first, last, minimum and maximum points of each bucket are kept
+        - buckets follow x (log10(x) for log scale) if x is sorted, otherwise they hold the same number of points
+    Return the sorted indices of the kept points
+    """
+    x   = np.asarray(x)
+    y   = np.asarray(y)
+    num = len(y)
+    if num <= 4*num_buckets:
+        return np.arange(num)
+
+    # position of the points along the axis
+    pos = x
+    if x_scale == 'log':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pos = np.log10(x)
+
+    # assign each point to a bucket
+    if pos[-1] > pos[0] and np.isfinite(pos[0]) and np.isfinite(pos[-1]) and np.all(pos[1:] >= pos[:-1]):
+        bucket = ((pos - pos[0]) * (num_buckets/(pos[-1] - pos[0]))).astype(np.intp)
+        np.minimum(bucket, num_buckets-1, out=bucket)
+    else:
+        bucket = np.arange(num, dtype=np.intp) * num_buckets // num
+
+    # buckets are contiguous, so reduce them segment by segment
+    starts = np.concatenate(([0], np.flatnonzero(bucket[1:] != bucket[:-1]) + 1))
+    ends   = np.append(starts[1:], num) - 1
+    seg    = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    keep   = [starts, ends]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(y, starts)
+        idx     = np.flatnonzero(y == extreme[seg])
+        first   = np.concatenate(([True], seg[idx][1:] != seg[idx][:-1]))
+        keep.append(idx[first])
+
+    return np.unique(np.concatenate(keep))
+
+def _markevery_indices(markevery, num):
+    """
+    This routine converts markevery into the indices of the marked points (None if not supported)
+    """
+    if markevery is None:
+        return np.arange(num)
+    if isinstance(markevery, (int, np.integer)) and not isinstance(markevery, bool):
+        return np.arange(0, num, markevery)
+    if isinstance(markevery, tuple) and len(markevery) == 2 \
+            and all(isinstance(i, (int, np.integer)) for i in markevery):
+        return np.arange(markevery[0], num, markevery[1])
+    if isinstance(markevery, slice):
+        return np.arange(num)[markevery]
+    if isinstance(markevery, (list, np.ndarray)):
+        markevery = np.asarray(markevery)
+        if markevery.dtype == bool:
+            return np.flatnonzero(markevery)
+        if np.issubdtype(markevery.dtype, np.integer):
+            return markevery
+    return None
+
+def decimate_line(x, y, method, dpi, x_scale='linear', marker='', markevery=1, ax=None):
+    """
+    This routine decimates a curve to the pixel columns of an axis
+        - method   : decimation method (choices: ["minmax"])
+        - dpi      : resolution used to count the pixel columns of the axis
+        - x_scale  : scale of the x axis (choices: ["linear", "log"])
+        - marker   : marker of the line, the marked points are always kept
+        - markevery: markevery of the line, converted to the indices of the decimated curve
+    Return the decimated x, y and markevery
+    """
+    if method != "minmax":
+        raise ValueError("lib_gyc: unknown decimation method '{}' (choices: ['minmax']).".format(method))
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.ndim != 1 or y.ndim != 1 or len(x) != len(y):
+        print("lib_gyc: decimation only supports 1D x and y of the same length, plot the full data.")
+        return x, y, markevery
+
+    _import_matplotlib()
+    # one bucket per pixel column of the axis
+    ax          = plt.gca() if ax is None else ax
+    fig         = ax.get_figure()
+    num_buckets = max(1, int(ax.get_position().width * fig.get_figwidth() * dpi))
+    kept        = decimate_minmax(x, y, num_buckets, x_scale)
+
+    # keep the marked points and remap markevery to the decimated curve
+    if marker not in ('', ' ', 'None', None):
+        marked = _markevery_indices(markevery, len(y))
+        if marked is None:
+            print("lib_gyc: markevery of type {} is not supported with decimation, markers follow the decimated curve.".format(type(markevery).__name__))
+        else:
+            kept      = np.union1d(kept, marked)
+            markevery = np.searchsorted(kept, marked).tolist()
+
+    return x[kept], y[kept], markevery
+
+def gload_field(source, shape=None, dtype='float64', offset=0, order='C'):
+    """
+    This routine opens a field without loading it into memory
+        - source: array (returned as is), path of a .npy file, path of a raw binary file,
+                  descriptor of a raw binary file {"path", "shape", "dtype", "offset", "order"}, or
+                  descriptor of an array of a .npz file {"path", "key"} (memory-mapped if stored uncompressed)
+        - shape : shape of a raw binary file
+        - dtype : data type of a raw binary file
+        - offset: offset in bytes of the data in a raw binary file
+        - order : memory layout of a raw binary file (choices: ['C', 'F'])
+    Return a read-only np.memmap for files
+    """
+    if isinstance(source, dict) and str(source["path"]).endswith('.npz'):
+        return _npz_member(source["path"], source["key"])
+    if isinstance(source, dict):
+        return gload_field(source["path"], shape=source["shape"], dtype=source.get("dtype", 'float64'), \
+                           offset=source.get("offset", 0), order=source.get("order", 'C'))
+    if not isinstance(source, (str, os.PathLike)):
+        return source
+    if str(source).endswith('.npy'):
+        return np.load(source, mmap_mode='r')
+    if shape is None:
+        raise ValueError("lib_gyc: the shape of the raw binary file '{}' is required.".format(source))
+    return np.memmap(source, dtype=dtype, mode='r', offset=offset, shape=tuple(shape), order=order)
+
+def _reduce_groups(arr, factor, ufunc, dtype):
+    """
+    This routine reduces groups of factor consecutive rows (the last group may be smaller)
+        - the rows k, k+factor, ... are accumulated as strided slices, much faster than ufunc.reduceat on short groups
+    """
+    num   = arr.shape[0]
+    whole = num - num % factor
+    out   = np.array(arr[0:whole:factor], dtype=dtype)
+    for k in range(1, factor):
+        ufunc(out, arr[k:whole:factor], out=out)
+    if whole < num:
+        out = np.concatenate((out, ufunc.reduce(arr[whole:], axis=0, dtype=dtype, keepdims=True)))
+    return out
+
+def block_reduce(arr, factors, method='mean', chunk_bytes=1 << 26):
+    """
+    This routine reduces a 2D array block by block, streaming over groups of rows
+        - factors    : (fy, fx) size of the blocks along the rows and the columns (the last blocks may be smaller)
+        - method     : reduction of a block (choices: ['mean', 'min', 'max', 'minmax']), NaN is ignored by 'min' and 'max'
+                       'minmax' keeps the min or the max of the block, the farther from its mean (extrema stay visible)
+        - chunk_bytes: size of the rows read at once, which limits the peak memory for np.memmap
+    The type of the input is kept: 'min', 'max' and 'minmax' return it, 'mean' returns float32 for float32 and
+    integer inputs up to 16 bits (float64 otherwise)
+    """
+    ufuncs = {'mean': np.add, 'min': np.fmin, 'max': np.fmax}
+    parts  = ('mean', 'min', 'max') if method == 'minmax' else (method,)
+    ny, nx = arr.shape
+    fy, fx = factors
+    row_starts = np.arange(0, ny, fy)
+    col_starts = np.arange(0, nx, fx)
+    out        = {part: np.empty((len(row_starts), len(col_starts)), dtype=np.float64 if part == 'mean' else arr.dtype) \
+                  for part in parts}
+
+    # whole blocks of rows in each chunk (read once for all the parts)
+    rows_per_chunk = max(1, chunk_bytes // max(1, nx*arr.itemsize*fy)) * fy
+    for start in range(0, ny, rows_per_chunk):
+        chunk  = np.asarray(arr[start:start+rows_per_chunk])
+        for part in parts:
+            blocks = _reduce_groups(chunk, fy, ufuncs[part], out[part].dtype)
+            blocks = _reduce_groups(blocks.T, fx, ufuncs[part], out[part].dtype).T
+            out[part][start//fy:start//fy+blocks.shape[0]] = blocks
+
+    if 'mean' in out:
+        out['mean'] /= np.outer(np.diff(np.append(row_starts, ny)), np.diff(np.append(col_starts, nx)))
+        out['mean']  = out['mean'].astype(np.result_type(arr.dtype, np.float32), copy=False)
+    if method != 'minmax':
+        return out[method]
+    _mean = out['mean']
+    return np.where(out['max'] - _mean > _mean - out['min'], out['max'], out['min'])
+
+def downsample_factors(shape, dpi, ax=None):
+    """
+    This routine returns the block size (fy, fx) that reduces a field of the given shape to the pixel grid of an axis
+    """
+    _import_matplotlib()
+    ax      = plt.gca() if ax is None else ax
+    fig     = ax.get_figure()
+    _pos    = ax.get_position()
+    _pixels = (max(2, int(_pos.height * fig.get_figheight() * dpi)), max(2, int(_pos.width * fig.get_figwidth() * dpi)))
+    return (max(1, -(-shape[0] // _pixels[0])), max(1, -(-shape[1] // _pixels[1])))
+
+def downsample_method(downsample):
+    """
+    This routine returns the block reduction of the setting downsample of gcontour ('minmax' or 'mean')
+    """
+    return 'minmax' if downsample == 'minmax' else 'mean'
+
+def downsample_field(x, y, var, dpi, method='mean', ax=None):
+    """
+    This routine reduces a field to the pixel grid of an axis
+        - x, y  : coordinates of the centers (reduced as var) or of the corners (the block corners are kept), 1D or 2D
+        - var   : 2D field
+        - dpi   : resolution used to count the pixels of the axis
+        - method: reduction of a block of var (choices: ['mean', 'min', 'max', 'minmax'])
+    Return the reduced x, y and var (unchanged if the field is not larger than the pixel grid)
+    """
+    ny, nx  = np.shape(var)
+    factors = downsample_factors((ny, nx), dpi, ax=ax)
+    if factors == (1, 1):
+        return x, y, var
+
+    var = block_reduce(var, factors, method)
+    if np.ndim(x) == 1:
+        # 1D coordinates: centers are averaged, edges (one more point) are subsampled
+        x = block_reduce(np.reshape(x, (1, -1)), (1, factors[1]), 'mean')[0] if len(x) == nx \
+            else np.asarray(x)[np.append(np.arange(0, nx, factors[1]), nx)]
+        y = block_reduce(np.reshape(y, (1, -1)), (1, factors[0]), 'mean')[0] if len(y) == ny \
+            else np.asarray(y)[np.append(np.arange(0, ny, factors[0]), ny)]
+    elif np.shape(x) == (ny, nx):
+        x = block_reduce(x, factors, 'mean')
+        y = block_reduce(y, factors, 'mean')
+    else:
+        rows = np.append(np.arange(0, ny, factors[0]), ny)
+        cols = np.append(np.arange(0, nx, factors[1]), nx)
+        x    = np.asarray(x[rows][:, cols])
+        y    = np.asarray(y[rows][:, cols])
+    return x, y, var
+
+# ---------------------------------------------------------------------------- #
+#                               section: readers                               #
+# ---------------------------------------------------------------------------- #
+_CSV_CHUNK = 1 << 26        # bytes of a CSV file parsed at once
+_CSV_BLOCK = 1 << 20        # bytes of a CSV file searched at once for line breaks
+
+def _npz_member(path, key):
+    """
+    This routine opens an array of a .npz file: memory-mapped if the member is stored uncompressed (np.savez),
+    loaded otherwise (np.savez_compressed)
+    """
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(key + '.npy')
+    if info.compress_type == zipfile.ZIP_STORED:
+        with open(path, 'rb') as f:
+            f.seek(info.header_offset)
+            name_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            read    = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read(f)
+            offset  = f.tell()
+        if not dtype.hasobject:
+            return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran else 'C')
+    with np.load(path) as data:
+        return data[key]
+
+def _row_range(rows, num=None):
+    """
+    This routine returns (start, stop) of a row range (None: all the rows, stop None: up to the end)
+    """
+    start, stop = (0, None) if rows is None else rows
+    if num is not None:
+        start, stop, _ = slice(start, stop).indices(num)
+    return start, stop
+
+def _select_columns(names, columns):
+    """
+    This routine returns the indices of the selected columns (by name or index, None for all)
+    """
+    if columns is None:
+        return list(range(len(names)))
+    index = []
+    for column in columns:
+        if column in names:
+            index.append(names.index(column))
+        elif isinstance(column, (int, np.integer)) and -len(names) <= column < len(names):
+            index.append(column % len(names))
+        else:
+            raise ValueError("lib_gyc: unknown column {!r} (columns: {}).".format(column, names))
+    return index
+
+def gread_binary(path, dtype='float64', num_columns=1, names=None, columns=None, rows=None, step=1, offset=0):
+    """
+    This routine reads the columns of a raw binary file of records without loading it (np.memmap views)
+
+    ---
+    Parameters
+    ---
+        - path       : path of the file
+        - dtype      : type of the values, or structured type of a record (e.g. [('t', '<f8'), ('u', '<f4')])
+        - num_columns: number of values per record (plain dtype)
+        - names      : names of the columns (plain dtype, None to use the indices)
+        - columns    : names or indices of the columns to read (None for all)
+        - rows       : (start, stop) range of the records (None for all, stop None up to the end)
+        - step       : stride between the records
+        - offset     : offset in bytes of the first record
+    ---
+    Return
+    ---
+        dict {name: 1D view of the column}, read from the disk only when used (e.g. by gplot)
+    ---
+    Example
+    ---
+    probe = gread_binary('probe.bin', num_columns=3, names=['t', 'u', 'v'], step=10) \n
+    gplot(probe['t'], probe['u'], settings)                                     \n
+    """
+    dtype = np.dtype(dtype)
+    if dtype.names is None:
+        names  = list(range(num_columns)) if names is None else list(names)
+        if len(names) != num_columns:
+            raise ValueError("lib_gyc: {} names given for {} columns.".format(len(names), num_columns))
+        dtype  = np.dtype([('f{}'.format(j), dtype) for j in range(num_columns)])
+        fields = ['f{}'.format(j) for j in range(num_columns)]
+    else:
+        names  = list(dtype.names)
+        fields = names
+    num         = (os.path.getsize(path) - offset) // dtype.itemsize
+    start, stop = _row_range(rows, num)
+    records     = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(num,))[start:stop:step]
+    return {names[j]: records[fields[j]] for j in _select_columns(names, columns)}
+
+def _csv_header(mm, delimiter, header):
+    """
+    This routine returns the names of the columns and the offset of the first data line of a CSV file
+    """
+    end    = mm.find(b'\n')
+    end    = len(mm) if end < 0 else end
+    line   = mm[:end].decode()
+    tokens = [token.strip() for token in (line.split(delimiter) if delimiter.strip() else line.split())]
+    if header == 'auto':
+        try:
+            [float(token) for token in tokens]
+            header = False
+        except ValueError:
+            header = True
+    if header:
+        return tokens, min(end + 1, len(mm))
+    return list(range(len(tokens))), 0
+
+def _csv_skip(mm, pos, num):
+    """
+    This routine returns the offset of the line num lines after the one starting at pos
+    """
+    while num > 0 and pos < len(mm):
+        chunk = mm[pos:pos+_CSV_BLOCK]
+        count = chunk.count(b'\n')
+        if count >= num:
+            return pos + int(np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)[num-1]) + 1
+        num -= count
+        pos += len(chunk)
+    return min(pos, len(mm))
+
+def _csv_parse(mm, pos, num_columns, delimiter, num_rows, step):
+    """
+    This routine parses the lines of a CSV file from pos (num_rows rows, every step-th line) chunk by chunk
+        - lines skipped by the stride or after the last row are not parsed (only their line breaks are searched)
+    Return the 2D array of the values (rows, columns)
+    """
+    table = bytes.maketrans(delimiter.encode(), b' ') if delimiter.strip() else None
+    parts = []
+    phase = 0                               # lines to skip before the next kept line
+    done  = 0
+    while pos < len(mm) and (num_rows is None or done < num_rows):
+        end = min(pos + _CSV_CHUNK, len(mm))
+        if end < len(mm):
+            end = mm.rfind(b'\n', pos, end) + 1 or (mm.find(b'\n', end) + 1 or len(mm))
+        if num_rows is not None:
+            end = min(end, _csv_skip(mm, pos, phase + (num_rows - done - 1) * step + 1))
+        chunk = mm[pos:end]
+        pos   = end
+        if step > 1:
+            # keep the bytes of every step-th line (mask: +1 at the start of a kept line, -1 after its line break)
+            buf    = np.frombuffer(chunk, dtype=np.uint8)
+            eol    = np.flatnonzero(buf == 10)
+            lines  = len(eol) + int(buf[-1] != 10)
+            starts = np.concatenate(([0], eol + 1))[:lines][phase::step]
+            ends   = np.append(eol + 1, len(buf))[:lines][phase::step]
+            if len(starts) * 64 < len(buf):
+                # a few long lines kept: copy them one by one
+                chunk = b''.join([chunk[s:e] for s, e in zip(starts.tolist(), ends.tolist())])
+            else:
+                mark = np.zeros(len(buf) + 1, dtype=np.int8)
+                mark[starts] = 1
+                mark[ends]   = -1
+                chunk = buf[np.cumsum(mark[:-1], dtype=np.int8).view(bool)].tobytes()
+            phase  = (phase - lines) % step
+        values = np.fromstring(chunk.translate(table) if table is not None else chunk, sep=' ')
+        if values.size % num_columns != 0:
+            raise ValueError("lib_gyc: CSV lines must hold {} numbers each (empty or text fields are not supported).".format(num_columns))
+        values = values.reshape(-1, num_columns)
+        if num_rows is not None:
+            values = values[:num_rows-done]
+        done  += len(values)
+        parts.append(values)
+    return np.concatenate(parts) if parts else np.empty((0, num_columns))
+
+def gread_csv(path, columns=None, rows=None, step=1, delimiter=',', header='auto', cache=False):
+    """
+    This routine reads the columns of a numeric CSV file, parsed chunk by chunk from a memory map
+
+    ---
+    Parameters
+    ---
+        - path     : path of the file
+        - columns  : names (header) or indices of the columns to read (None for all)
+        - rows     : (start, stop) range of the data lines (None for all, stop None up to the end)
+        - step     : stride between the data lines (the skipped lines are not parsed)
+        - delimiter: separator of the values (' ' for any whitespace)
+        - header   : first line holds the names of the columns (True, False or 'auto': if it is not numeric)
+        - cache    : convert the file once into '<path>.gyc.npz' (uncompressed, rebuilt when the CSV changes),
+                     the next reads are memory-mapped views of it
+    ---
+    Return
+    ---
+        dict {name: 1D array of the column} (names from the header, or the indices)
+    ---
+    Example
+    ---
+    probe = gread_csv('probe.csv', columns=['t', 'u'], step=100) \n
+    gplot(probe['t'], probe['u'], settings)                       \n
+    """
+    if cache:
+        names, data = _csv_cached(path, delimiter, header)
+        start, stop = _row_range(rows, data.shape[1])
+        return {names[j]: data[j, start:stop:step] for j in _select_columns(names, columns)}
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        names, pos  = _csv_header(mm, delimiter, header)
+        start, stop = _row_range(rows)
+        if start < 0 or (stop is not None and stop < 0):
+            raise ValueError("lib_gyc: negative rows of a CSV file need cache=True (the lines are not indexed).")
+        pos         = _csv_skip(mm, pos, start)
+        num_rows    = None if stop is None else max(0, -(-(stop - start) // step))
+        values      = _csv_parse(mm, pos, len(names), delimiter, num_rows, step)
+    return {names[j]: np.ascontiguousarray(values[:, j]) for j in _select_columns(names, columns)}
+
+def _csv_cached(path, delimiter, header):
+    """
+    This routine returns the names and the (columns, rows) memory-mapped values of a CSV file from its cache
+    """
+    cache  = str(path) + '.gyc.npz'
+    stat   = os.stat(path)
+    source = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    try:
+        with np.load(cache) as data:
+            if np.array_equal(data["source"], source):
+                return json.loads(str(data["names"])), _npz_member(cache, "data")
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        pass
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        names, pos = _csv_header(mm, delimiter, header)
+        values     = _csv_parse(mm, pos, len(names), delimiter, None, 1)
+    np.savez(cache, data=np.ascontiguousarray(values.T), names=np.array(json.dumps(names)), source=source)
+    del values
+    return names, _npz_member(cache, "data")
+
+# ---------------------------------------------------------------------------- #
+#                              section: profiling                              #
+# ---------------------------------------------------------------------------- #
+_gprofile      = None                           # registry of the profiler, None when disabled (see gprofile_enable)
+_gprofile_lock = threading.Lock()
+
+def gprofile_enable(max_events=100000):
+    """
+    This routine enables the profiling of gplot, gcontour, gcontourline and gsavefig
+        - every routine records the time of its phases (e.g. "gplot/stats", "gcontour/artist", "gsavefig/draw")
+          and counters (e.g. "gplot/points", "gcontour/quads", "gsavefig/bytes")
+        - max_events: number of phase events kept for gprofile_export(format='chrome') (the statistics are always complete)
+    The instrumentation costs a test of a global when the profiling is disabled
+    """
+    global _gprofile
+    if _gprofile is None:
+        _gprofile = {"phases": {}, "counters": {}, "events": [], "max_events": max_events, "t0": time.perf_counter()}
+
+def gprofile_disable():
+    """
+    This routine disables the profiling (the records are dropped)
+    """
+    global _gprofile
+    _gprofile = None
+
+def gprofile_reset():
+    """
+    This routine drops the records of the profiling and keeps it enabled
+    """
+    if _gprofile is not None:
+        with _gprofile_lock:
+            _gprofile["phases"].clear()
+            _gprofile["counters"].clear()
+            _gprofile["events"].clear()
+            _gprofile["t0"] = time.perf_counter()
+
+def _gprofile_mark():
+    """
+    This routine returns the current time if the profiling is enabled, None otherwise
+    """
+    return None if _gprofile is None else time.perf_counter()
+
+def _gphase(mark, name, now=None):
+    """
+    This routine records the time elapsed from mark to now (default: the current time) as one call of phase name
+    Return now, mark of the next phase (None if the profiling is disabled)
+    """
+    if mark is None or _gprofile is None:
+        return None
+    now = time.perf_counter() if now is None else now
+    with _gprofile_lock:
+        phase = _gprofile["phases"].setdefault(name, {"calls": 0, "total": 0.0, "min": np.inf, "max": 0.0})
+        phase["calls"] += 1
+        phase["total"] += now - mark
+        phase["min"]    = min(phase["min"], now - mark)
+        phase["max"]    = max(phase["max"], now - mark)
+        if len(_gprofile["events"]) < _gprofile["max_events"]:
+            _gprofile["events"].append(('X', name, mark, now - mark, threading.get_ident()))
+    return now
+
+def _gcount(name, value):
+    """
+    This routine adds value to the counter name
+    """
+    if _gprofile is None:
+        return
+    with _gprofile_lock:
+        total = _gprofile["counters"].get(name, 0) + value
+        _gprofile["counters"][name] = total
+        if len(_gprofile["events"]) < _gprofile["max_events"]:
+            _gprofile["events"].append(('C', name, time.perf_counter(), total, threading.get_ident()))
+
+def gprofile_stats(prefix=''):
+    """
+    This routine returns the records of the profiling whose name starts with prefix
+    Return {"phases": {name: {"calls", "total", "mean", "min", "max"}}, "counters": {name: value}} (times in seconds)
+    """
+    if _gprofile is None:
+        return {"phases": {}, "counters": {}}
+    with _gprofile_lock:
+        phases   = {name: dict(phase, mean=phase["total"]/phase["calls"]) \
+                    for name, phase in _gprofile["phases"].items() if name.startswith(prefix)}
+        counters = {name: value for name, value in _gprofile["counters"].items() if name.startswith(prefix)}
+    return {"phases": phases, "counters": counters}
+
+def gprofile_report(prefix='', sort='total'):
+    """
+    This routine prints the records of the profiling (phases sorted by sort: 'total', 'calls', 'mean', 'max' or 'name')
+    Return the records (see gprofile_stats)
+    """
+    stats = gprofile_stats(prefix)
+    if sort == 'name':
+        names = sorted(stats["phases"])
+    else:
+        names = sorted(stats["phases"], key=lambda name: -stats["phases"][name][sort])
+    print("lib_gyc: {:<28s} {:>8s} {:>12s} {:>12s} {:>12s}".format('phase', 'calls', 'total (ms)', 'mean (ms)', 'max (ms)'))
+    for name in names:
+        phase = stats["phases"][name]
+        print("lib_gyc: {:<28s} {:8d} {:12.3f} {:12.3f} {:12.3f}".format(name, phase["calls"], 1e3*phase["total"], \
+                                                                        1e3*phase["mean"], 1e3*phase["max"]))
+    for name in sorted(stats["counters"]):
+        print("lib_gyc: {:<28s} {:>8s} {:12d}".format(name, 'count', int(stats["counters"][name])))
+    return stats
+
+def gprofile_export(filename, format='json'):
+    """
+    This routine writes the records of the profiling to a file
+        - format: 'json'   (statistics of gprofile_stats)
+                  'chrome' (trace events, open in chrome://tracing or https://ui.perfetto.dev)
+    """
+    if format == 'json':
+        content = gprofile_stats()
+    elif format == 'chrome':
+        t0     = 0.0 if _gprofile is None else _gprofile["t0"]
+        events = [] if _gprofile is None else list(_gprofile["events"])
+        trace  = []
+        for kind, name, start, value, tid in events:
+            event = {"name": name, "cat": name.split('/')[0], "ph": kind, "ts": 1e6*(start - t0), "pid": os.getpid(), "tid": tid}
+            if kind == 'X':
+                event["dur"]  = 1e6*value
+            else:
+                event["args"] = {"value": value}
+            trace.append(event)
+        content = {"traceEvents": trace, "displayTimeUnit": 'ms'}
+    else:
+        raise ValueError("lib_gyc: unknown profile format '{}' (choices: ['json', 'chrome']).".format(format))
+    with open(filename, 'w') as file:
+        json.dump(content, file, indent=1)
+
+# ---------------------------------------------------------------------------- #
+#                                section: cache                                #
+# ---------------------------------------------------------------------------- #
+_GCACHE_SUFFIX = '.gychash'
+_GCACHE_STYLES = {"gplot": "GPlotStyle", "gplot_multi": "GPlotStyle", "gcontour": "GContourStyle", "gcontourline": "GContourLineStyle"}
+_GHASH_CHUNK   = 1 << 24
+
+_gcache_enabled = False                        # record the inputs of the drawings (see gsavefig_cache_enable)
+
+def gsavefig_cache_enable():
+    """
+    This routine enables the recording of the inputs of gplot, gplot_multi, gcontour and gcontourline for gsavefig(_cache=True)
+        - each drawing hashes its data and resolved settings once, and keeps the digest on its artist (never the data)
+        - a digest goes away with its artist (e.g. ax.clear(), fig.clf()), so a reused figure is hashed from its current drawings
+    The recording costs a test of a global when it is disabled
+    """
+    global _gcache_enabled
+    _gcache_enabled = True
+
+def gsavefig_cache_disable():
+    """
+    This routine disables the recording of the inputs of the drawings (figures drawn meanwhile are never skipped by gsavefig)
+    """
+    global _gcache_enabled
+    _gcache_enabled = False
+
+def _grecord(artist, routine, data, style):
+    """
+    This routine records the digest of the inputs of a drawing routine on the artist it returns (when the recording is enabled)
+    """
+    if _gcache_enabled:
+        digest = hashlib.blake2b(digest_size=16)
+        _ghash_layer(digest, routine, data, style)
+        artist._gyc_input = digest.digest()
+
+def _grecord_invalidate(fig):
+    """
+    This routine marks a figure as changed after drawing (e.g. streams, templates), so that its saving is never skipped
+    """
+    fig._gyc_changed = True
+
+def _ghash_update(digest, obj):
+    """
+    This routine feeds data (arrays, lists, scalars, paths of fields) into a hash
+    """
+    if isinstance(obj, (str, os.PathLike)) or (isinstance(obj, dict) and "path" in obj):
+        obj = gload_field(obj)
+    if isinstance(obj, dict):
+        digest.update(repr(sorted(obj.items())).encode())
+        return
+    if isinstance(obj, mpl.tri.Triangulation):
+        obj = (obj.x, obj.y, obj.triangles, obj.mask)
+    if obj is None or np.isscalar(obj):
+        digest.update(repr(obj).encode())
+        return
+    arr = np.asarray(obj) if not isinstance(obj, (list, tuple)) or len(obj) == 0 or np.isscalar(obj[0]) else None
+    if arr is None or arr.dtype == object:
+        digest.update(('seq%d' % len(obj)).encode())
+        for item in obj:
+            _ghash_update(digest, item)
+        return
+    digest.update('{}{}'.format(arr.dtype.str, arr.shape).encode())
+    if arr.ndim == 0:
+        digest.update(arr.tobytes())
+        return
+    # groups of rows are hashed in turn, so that non-contiguous arrays and np.memmap are never copied as a whole
+    rows = max(1, _GHASH_CHUNK // max(1, arr[0].nbytes)) if arr.ndim > 1 else _GHASH_CHUNK // max(1, arr.itemsize)
+    for start in range(0, arr.shape[0], rows):
+        digest.update(np.ascontiguousarray(arr[start:start+rows]).data)
+
+def _ghash_layer(digest, routine, data, style):
+    """
+    This routine feeds the inputs of a drawing routine (routine, resolved settings, data) into a hash
+    """
+    cls   = globals()[_GCACHE_STYLES[routine]]
+    style = style if isinstance(style, cls) else cls(style)
+    digest.update('{}|{!r}'.format(routine, style.to_dict()).encode())
+    _ghash_update(digest, data)
+
+def _ghash_inputs(inputs, figsize, dpi, format):
+    """
+    This routine hashes the inputs of a figure with the output parameters
+        - inputs: list of (routine, data, settings) of the layers, or of the digests recorded on the artists
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('{}|{}|{}|{}'.format(mpl.__version__, tuple(float(v) for v in figsize), float(dpi), format).encode())
+    for layer in inputs:
+        if isinstance(layer, bytes):
+            digest.update(layer)
+        else:
+            _ghash_layer(digest, *layer)
+    return digest.hexdigest()
+
+def gsavefig_hash(fig=None, figsize=None, dpi=300, format='png'):
+    """
+    This routine returns the hash of the inputs of a figure drawn by lib_gyc (data, resolved settings, figsize, dpi, format)
+        - the inputs are the digests recorded on the current artists of the figure (see gsavefig_cache_enable)
+        - None if the figure cannot be cached (nothing recorded, or changed after drawing)
+        - artists added directly with matplotlib are not part of the hash
+    """
+    _import_matplotlib()
+    fig    = plt.gcf() if fig is None else fig
+    if getattr(fig, "_gyc_changed", False):
+        return None
+    inputs = [artist._gyc_input for artist in fig.findobj(lambda artist: hasattr(artist, "_gyc_input"))]
+    if not inputs:
+        return None
+    figsize = fig.get_size_inches() if figsize is None else figsize
+    return _ghash_inputs(inputs, figsize, dpi, format)
+
+def _gcache_hit(filename, digest):
+    """
+    This routine checks if an output exists, is unchanged since it was saved, and was saved from the inputs of hash digest
+    """
+    try:
+        with open(filename + _GCACHE_SUFFIX) as file:
+            entry = json.load(file)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return False
+    return entry.get("hash") == digest and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+def _gcache_record(filename, digest):
+    """
+    This routine records the hash of the inputs of an output next to it (filename + _GCACHE_SUFFIX)
+    """
+    stat  = os.stat(filename)
+    entry = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    with open(filename + _GCACHE_SUFFIX, 'w') as file:
+        json.dump(entry, file)
+
+def gsavefig_cache_clean(directory='.', recursive=False, verbose=True):
+    """
+    This routine removes the stale hash records of gsavefig(_cache=True) in a directory
+        - a record is stale if its output is missing, or was modified or replaced after it was saved
+    Return the list of the removed records
+    """
+    removed = []
+    walk    = os.walk(directory) if recursive else [(directory, None, os.listdir(directory))]
+    for root, _, names in walk:
+        for name in names:
+            if not name.endswith(_GCACHE_SUFFIX):
+                continue
+            record   = os.path.join(root, name)
+            filename = record[:-len(_GCACHE_SUFFIX)]
+            try:
+                with open(record) as file:
+                    digest = json.load(file).get("hash")
+            except (OSError, ValueError):
+                digest = None
+            if digest is None or not _gcache_hit(filename, digest):
+                os.remove(record)
+                removed.append(record)
+    if verbose:
+        print("lib_gyc: removed {} stale cache records in '{}'.".format(len(removed), directory))
+    return removed
+
+# ---------------------------------------------------------------------------- #
+#                          section: asynchronous saving                        #
+# ---------------------------------------------------------------------------- #
+_GSAVE_WORKERS = 2                              # threads encoding and writing the outputs of gsavefig(_async=True)
+_GSAVE_PENDING = 8                              # outputs waiting to be written, gsavefig blocks beyond (back-pressure)
+_GSAVE_RASTER  = ('png', 'tif', 'tiff', 'webp') # formats encoded in background from a snapshot of the canvas
+_gsave_pool    = None
+_gsave_slots   = None
+_gsave_futures = []
+_gsave_lock    = threading.Lock()
+
+def _gsave_write(filename, format, dpi, data, shape, digest):
+    """
+    This routine encodes (from a RGBA snapshot of shape) or copies (encoded bytes) an output to its file
+    Return a report with keys "filename", "status" ('ok' or 'failed'), "time" (seconds) and "error" (traceback or None)
+    """
+    report  = {"filename": filename, "status": 'ok', "time": 0.0, "error": None}
+    t_start = time.perf_counter()
+    _gp     = _gprofile_mark()
+    try:
+        if shape is None:
+            with open(filename, 'wb') as file:
+                file.write(data)
+        else:
+            image = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+            mpl.image.imsave(filename, image, format={'tif': 'tiff'}.get(format, format), dpi=dpi)
+        if digest is not None:
+            _gcache_record(filename, digest)
+        _gphase(_gp, "gsavefig/write")
+        _gcount("gsavefig/bytes", os.path.getsize(filename))
+    except Exception:
+        report["status"] = 'failed'
+        report["error"]  = traceback.format_exc()
+        print("lib_gyc: failed to save '{}':\n{}".format(filename, report["error"]))
+    report["time"] = time.perf_counter() - t_start
+    return report
+
+def _gsave_submit(fig, filename, dpi, format, digest):
+    """
+    This routine rasterizes a figure in the calling thread and queues its encoding and writing
+        - png, tif and webp are snapshotted as RGBA pixels, other formats are rendered to bytes and only the writing is queued
+    """
+    global _gsave_pool, _gsave_slots
+    with _gsave_lock:
+        if _gsave_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _gsave_pool  = ThreadPoolExecutor(max_workers=_GSAVE_WORKERS, thread_name_prefix='gsavefig')
+            _gsave_slots = threading.BoundedSemaphore(_GSAVE_PENDING)
+            atexit.register(gsavefig_flush)
+
+    _gp    = _gprofile_mark()
+    buffer = io.BytesIO()
+    if format in _GSAVE_RASTER:
+        fig.savefig(buffer, format='rgba', dpi=dpi, pad_inches=0.1)
+        shape = (int(fig.get_figheight() * dpi), int(fig.get_figwidth() * dpi), 4)
+    else:
+        fig.savefig(buffer, format=format, dpi=dpi, pad_inches=0.1)
+        shape = None
+    _gp = _gphase(_gp, "gsavefig/draw")
+
+    _gsave_slots.acquire()
+    try:
+        future = _gsave_pool.submit(_gsave_write, filename, format, dpi, buffer.getvalue(), shape, digest)
+    except Exception:
+        _gsave_slots.release()
+        raise
+    future.add_done_callback(lambda _: _gsave_slots.release())
+    _gphase(_gp, "gsavefig/queue")
+    with _gsave_lock:
+        _gsave_futures.append(future)
+    return future
+
+def gsavefig_flush(timeout=None):
+    """
+    This routine waits for the outputs queued by gsavefig(_async=True)
+        - timeout: maximum time to wait in seconds (None to wait for all)
+    Return the list of reports of the outputs written since the last flush (failed ones are also printed when they fail)
+    """
+    from concurrent.futures import wait
+    with _gsave_lock:
+        futures = list(_gsave_futures)
+    done, _ = wait(futures, timeout=timeout)
+    with _gsave_lock:
+        for future in done:
+            _gsave_futures.remove(future)
+    return [future.result() for future in futures if future in done]
+
+# ---------------------------------------------------------------------------- #
+#                               section: batch                                 #
+# ---------------------------------------------------------------------------- #
+_GBATCH_ROUTINES = ("gplot", "gcontour", "gcontourline")
+
+def gbatch_layer(routine, data, gsettings=None):
+    """
+    This routine builds one layer of a figure job for gsavefig_batch
+        - routine  : name of the plotting routine (choices: "gplot", "gcontour", "gcontourline")
+        - data     : positional data of the routine, e.g. (x,y) or (x_2d,y_2d,z_2d)
+        - gsettings: settings of the routine (None to use the default style)
+    """
+    if routine not in _GBATCH_ROUTINES:
+        raise ValueError("lib_gyc: unknown routine '{}' (choices: {}).".format(routine, _GBATCH_ROUTINES))
+    layer = {
+        "routine" : routine,
+        "data"    : tuple(data),
+        "settings": gsettings,
+    }
+    return layer
+
+def gbatch_job():
+    """
+    This routine initializes a figure job for gsavefig_batch.
+        - filename: name of the output file without extension
+        - figsize : size of the figure in inches (None to use the default size)
+        - dpi     : resolution of the output file
+        - format  : format of the output file (choices: 'png', 'pdf', 'eps', 'svg')
+        - layers  : list of layers built by gbatch_layer, drawn in order on the same axis
+        - cache   : skip the job if the output exists and was saved from the same layers (see gsavefig)
+    """
+    job = {
+        "filename": 'my_figure',
+        "figsize" : None,
+        "dpi"     : 300,
+        "format"  : 'png',
+        "layers"  : [],
+        "cache"   : False,
+    }
+    return job
+
+def _gbatch_init():
+    """
+    This routine switches a worker process to the non-interactive Agg backend
+    """
+    _import_matplotlib()
+    mpl.use('Agg', force=True)
+
+def _gbatch_draw(job):
+    """
+    This routine draws all layers of a job on a new figure and returns it
+    """
+    _import_matplotlib()
+    fig = plt.figure(figsize=job["figsize"])
+    try:
+        for layer in job["layers"]:
+            routine = globals()[layer["routine"]]
+            if layer["settings"] is None:
+                routine(*layer["data"])
+            else:
+                routine(*layer["data"], layer["settings"])
+    except Exception:
+        plt.close(fig)
+        raise
+    return fig
+
+def _gbatch_render(job):
+    """
+    This routine draws all layers of a job on a new figure and saves it
+    Return 'ok', or 'cached' if the output is up to date (the layers are hashed before drawing)
+    """
+    _import_matplotlib()
+    filename = job["filename"] + '.' + job["format"]
+    if job.get("cache", False):
+        inputs = [(layer["routine"], layer["data"], layer["settings"]) for layer in job["layers"]]
+        digest = _ghash_inputs(inputs, assign_value(job["figsize"], mpl.rcParams['figure.figsize']), job["dpi"], job["format"])
+        if _gcache_hit(filename, digest):
+            return 'cached'
+    fig = _gbatch_draw(job)
+    try:
+        gsavefig(job["filename"], _figsize=job["figsize"], _dpi=job["dpi"], _format=job["format"])
+    finally:
+        plt.close(fig)
+    if job.get("cache", False):
+        _gcache_record(filename, digest)
+    return 'ok'
+
+def _gbatch_worker(job):
+    """
+    This routine renders one job and reports its timing (errors are caught and reported)
+    """
+    report = {
+        "filename": job["filename"] + '.' + job["format"],
+        "status"  : 'ok',
+        "time"    : 0.0,
+        "error"   : None,
+        "pid"     : os.getpid(),
+    }
+    t_start = time.perf_counter()
+    try:
+        report["status"] = _gbatch_render(job)
+    except Exception:
+        report["status"] = 'failed'
+        report["error"]  = traceback.format_exc()
+    report["time"] = time.perf_counter() - t_start
+    return report
+
+def gsavefig_batch(jobs, processes=None, chunksize=None, mp_context=None, verbose=True):
+    """
+    This routine renders and saves a list of figure jobs in parallel worker processes
+
+    ---
+    Parameters
+    ---
+        - jobs      : list of jobs initialized by gbatch_job()
+        - processes : number of worker processes (None to use all cores, 1 to render in the current process)
+        - chunksize : number of jobs sent to a worker at once (None to choose automatically)
+        - mp_context: multiprocessing context of the pool (None to use the default one)
+        - verbose   : print a summary of the batch or not
+    ---
+    Return
+    ---
+        list of reports (one per job, in the order of jobs) with keys
+        "filename", "status" ('ok', 'cached' or 'failed'), "time" (seconds), "error" (traceback or None) and "pid".
+        A failed job does not abort the batch.
+    ---
+    Example
+    ---
+    job              = gbatch_job()                                  \n
+    job["filename"]  = 'case_001'                                    \n
+    job["layers"]    = [gbatch_layer("gplot", (x,y), gplot_style())] \n
+    reports          = gsavefig_batch([job, ...], processes=64)       \n
+    """
+    jobs       = list(jobs)
+    processes  = assign_value(processes, os.cpu_count() or 1)
+    processes  = max(1, min(processes, len(jobs)))
+    chunksize  = assign_value(chunksize, max(1, len(jobs) // (processes * 4)))
+
+    t_start = time.perf_counter()
+    if processes == 1:
+        reports = [_gbatch_worker(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context, initializer=_gbatch_init) as pool:
+            reports = list(pool.map(_gbatch_worker, jobs, chunksize=chunksize))
+    t_total = time.perf_counter() - t_start
+
+    if verbose:
+        num_failed = sum(report["status"] == 'failed' for report in reports)
+        num_cached = sum(report["status"] == 'cached' for report in reports)
+        print("lib_gyc: rendered {} figures with {} processes in {:.2f} s ({} cached, {} failed).".format(
+            len(reports), processes, t_total, num_cached, num_failed))
+        for report in reports:
+            if report["status"] == 'failed':
+                print("lib_gyc: failed to render '{}':\n{}".format(report["filename"], report["error"]))
+
+    return reports
+
+def _gtile_cull(fig, bbox):
+    """
+    This routine replaces every QuadMesh of a figure by the block of quads overlapping bbox (in inches)
+        - the rasterizer visits every quad (every gouraud triangle) even outside the output, so culling makes a tile cheap
+        - only the meshes drawn by gcontour are culled (their antialiasing is recorded), other meshes are drawn whole
+    """
+    for ax in fig.axes:
+        meshes = [artist for artist in ax.collections if isinstance(artist, mpl.collections.QuadMesh) \
+                  and hasattr(artist, "_gyc_antialiased")]
+        if not meshes:
+            continue
+        # artists of equal zorder are drawn in the order they were added, and a tile is added last:
+        # their zorders are spread in that order, so that a tile takes the place of its mesh
+        zorders = {mesh.get_zorder() for mesh in meshes}
+        rank    = {}
+        for artist in ax.get_children():
+            zorder = artist.get_zorder()
+            if zorder in zorders:
+                rank[zorder] = rank.get(zorder, -1) + 1
+                artist.set_zorder(zorder + rank[zorder] * 1e-9)
+        for mesh in meshes:
+            coords = mesh.get_coordinates()
+            array  = mesh.get_array()
+            points = mesh.get_transform().transform(coords.reshape(-1, 2)).reshape(coords.shape) / fig.dpi
+            corner = (points[:-1, :-1], points[1:, :-1], points[:-1, 1:], points[1:, 1:])
+            lo     = np.minimum(np.minimum(corner[0], corner[1]), np.minimum(corner[2], corner[3]))
+            hi     = np.maximum(np.maximum(corner[0], corner[1]), np.maximum(corner[2], corner[3]))
+            inside = (hi[..., 0] >= bbox.x0) & (lo[..., 0] <= bbox.x1) & (hi[..., 1] >= bbox.y0) & (lo[..., 1] <= bbox.y1)
+            rows   = np.flatnonzero(inside.any(axis=1))
+            cols   = np.flatnonzero(inside.any(axis=0))
+            if len(rows) == 0:
+                mesh.remove()
+                continue
+            i0, i1 = rows[0], rows[-1] + 2
+            j0, j1 = cols[0], cols[-1] + 2
+            # the values are on the corners for gouraud shading, on the quads otherwise
+            if array.shape[:2] == coords.shape[:2]:
+                array, shading = array[i0:i1, j0:j1], 'gouraud'
+            else:
+                array, shading = array[i0:i1-1, j0:j1-1], 'flat'
+            tile = mpl.collections.QuadMesh(coords[i0:i1, j0:j1], shading=shading, antialiased=mesh._gyc_antialiased)
+            tile.update_from(mesh)
+            tile.set_array(array)
+            tile.set_zorder(mesh.get_zorder())
+            tile.set_snap(mesh.get_snap())
+            tile.set_transform(mesh.get_transform())
+            tile.set_clip_box(mesh.get_clip_box())
+            tile.set_clip_path(mesh.get_clip_path())
+            mesh.remove()
+            ax.add_collection(tile, autolim=False)
+
+def _gtile_freeze_legends(fig, dpi):
+    """
+    This routine fixes the legends placed at the 'best' location to the location chosen on the full figure,
+    since the best location is searched again (and may change) when a tile is rendered
+    """
+    fig.set_dpi(dpi)
+    renderer = fig.canvas.get_renderer()
+    for ax in fig.axes:
+        legend = ax.get_legend()
+        if legend is None or getattr(legend, "_gyc_loc", None) not in (0, 'best'):
+            continue
+        # the best location is one of the codes 1-10 ('upper right', ...), the one giving the same box is kept
+        corner = legend.get_window_extent(renderer).p0
+        for code in range(1, 11):
+            legend.set_loc(code)
+            if np.allclose(legend.get_window_extent(renderer).p0, corner):
+                break
+
+_GTILE_MARGIN = 64
+
+def _gtile_worker(task):
+    """
+    This routine draws a job and rasterizes one tile (y0, y1, x0, x1) of its output, in pixels from the top left corner
+        - the tile is rendered with a margin of _GTILE_MARGIN pixels, so that the clipping and the path simplification
+          at the border of the canvas do not change the pixels kept
+    """
+    job, (t0, t1, s0, s1) = task
+    y0, y1 = t0 - _GTILE_MARGIN, t1 + _GTILE_MARGIN
+    x0, x1 = s0 - _GTILE_MARGIN, s1 + _GTILE_MARGIN
+    fig = _gbatch_draw(job)
+    try:
+        dpi    = job["dpi"]
+        height = int(fig.get_figheight() * dpi)   # Agg flips the rows with the truncated height of the canvas
+        # the top left corner stays on the pixel grid of the full output (lines and text are snapped to it),
+        # the right and bottom edges are nudged by rounding errors until the truncated size of the tile is exact
+        left, top     = x0/dpi, (height - y0)/dpi
+        right, bottom = x1/dpi, (height - y1)/dpi
+        while int((right - left) * dpi) < x1 - x0:
+            right  = np.nextafter(right, np.inf)
+        while int((top - bottom) * dpi) < y1 - y0:
+            bottom = np.nextafter(bottom, -np.inf)
+        bbox   = mpl.transforms.Bbox([[left, bottom], [right, top]])
+        _gtile_freeze_legends(fig, dpi)
+        _gtile_cull(fig, bbox.padded(2.0/dpi))
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='rgba', dpi=dpi, bbox_inches=bbox)
+    finally:
+        plt.close(fig)
+    image = np.frombuffer(buffer.getvalue(), dtype=np.uint8).reshape(y1 - y0, x1 - x0, 4)
+    return image[_GTILE_MARGIN:-_GTILE_MARGIN, _GTILE_MARGIN:-_GTILE_MARGIN]
+
+def gsavefig_tiled(job, tiles=(2, 2), processes=None, mp_context=None, verbose=True):
+    """
+    This routine renders one raster figure job in tiles rasterized by parallel worker processes, and stitches them
+
+    ---
+    Parameters
+    ---
+        - job       : job initialized by gbatch_job() (raster format: 'png', 'jpg', 'tif', ...)
+        - tiles     : (rows, columns) of the tile grid
+        - processes : number of worker processes (None to use one per tile up to the number of cores, 1 to render in the current process)
+        - mp_context: multiprocessing context of the pool (None to use the default one)
+        - verbose   : print the timing or not
+    ---
+    Return
+    ---
+        the stitched image (array of shape (height, width, 4) of uint8), also saved as job["filename"].job["format"]
+    ---
+    Note
+    ---
+        - every worker draws the whole job and keeps the quads of the meshes overlapping its tile,
+          so large fields are best given as paths of .npy files (see gload_field) rather than arrays
+        - the output matches a single-pass rendering up to the antialiasing (or the pixel snapping) of a few pixels,
+          tiles overlap by a margin that is cropped when stitching
+        - lines are clipped to each tile before being simplified and dashed by the renderer:
+            - long solid lines may differ on about 0.1% of the pixels (exact with rcParams['path.simplify'] = False)
+            - the dashes of dashed lines restart at the edges of the tiles
+    ---
+    Example
+    ---
+    job             = gbatch_job()                                           \n
+    job["filename"] = 'poster'                                               \n
+    job["dpi"]      = 600                                                    \n
+    job["layers"]   = [gbatch_layer("gcontour", ('x.npy', 'y.npy', 'u.npy'))] \n
+    gsavefig_tiled(job, tiles=(4, 4))                                         \n
+    """
+    _import_matplotlib()
+    if job["format"] in ('pdf', 'eps', 'ps', 'svg'):
+        raise ValueError("lib_gyc: tiled rendering needs a raster format, not '{}'.".format(job["format"]))
+    figsize    = assign_value(job["figsize"], mpl.rcParams['figure.figsize'])
+    width      = int(figsize[0] * job["dpi"])
+    height     = int(figsize[1] * job["dpi"])
+    rows       = np.linspace(0, height, tiles[0] + 1).astype(int)
+    cols       = np.linspace(0, width,  tiles[1] + 1).astype(int)
+    tasks      = [(job, (rows[i], rows[i+1], cols[j], cols[j+1])) for i in range(tiles[0]) for j in range(tiles[1])]
+    processes  = assign_value(processes, min(len(tasks), os.cpu_count() or 1))
+    processes  = max(1, min(processes, len(tasks)))
+
+    t_start = time.perf_counter()
+    if processes == 1:
+        images = [_gtile_worker(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context, initializer=_gbatch_init) as pool:
+            images = list(pool.map(_gtile_worker, tasks))
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    for (_, (y0, y1, x0, x1)), tile in zip(tasks, images):
+        image[y0:y1, x0:x1] = tile
+    mpl.image.imsave(job["filename"] + '.' + job["format"], image, format=job["format"], dpi=job["dpi"])
+    t_total = time.perf_counter() - t_start
+
+    if verbose:
+        print("lib_gyc: rendered '{}' in {} tiles with {} processes in {:.2f} s.".format(
+            job["filename"] + '.' + job["format"], len(tasks), processes, t_total))
+    return image
+
+# ---------------------------------------------------------------------------- #
+#                               section: exports                               #
+# ---------------------------------------------------------------------------- #
+# `from lib_gyc import *` exports the public routines with np and the matplotlib names (plt, mpl, ticker, ...),
+# which are resolved by __getattr__ (the star import imports matplotlib, `import lib_gyc` does not)
+__all__ = [name for name, value in globals().items() if not name.startswith('_') and not isinstance(value, type(os))] \
+          + ["np"] + list(_MATPLOTLIB_NAMES)
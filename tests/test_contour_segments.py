@@ -0,0 +1,81 @@
+import os
+import sys
+import numpy as np
+import pytest
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lib_gyc
+
+
+def make_field(kind):
+    if kind == 'saddles':
+        # coarse sampling: many cells have their diagonal corners on the same side of a level
+        x, y = np.linspace(-2.0, 2.0, 11), np.linspace(-1.5, 1.5, 9)
+        X, Y = np.meshgrid(x, y)
+        return x, y, np.sin(4.0 * X + 0.3) * np.sin(5.0 * Y + 0.2)
+    x    = np.linspace(-2.0, 2.0, 41)
+    y    = np.linspace(-1.5, 1.5, 31)
+    X, Y = np.meshgrid(x, y)
+    var  = np.sin(2.0 * X) * np.cos(3.0 * Y) + 0.1 * X
+    if kind == 'masked':
+        var[X**2 + Y**2 < 0.3] = np.nan
+    return x, y, var
+
+
+def canonical(segments):
+    """
+    This routine sorts the segments of a level, each from its lower end, to compare them as sets
+    """
+    segments = np.round(np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2), 9)
+    flip     = (segments[:, 0, 0] > segments[:, 1, 0]) | \
+               ((segments[:, 0, 0] == segments[:, 1, 0]) & (segments[:, 0, 1] > segments[:, 1, 1]))
+    segments[flip] = segments[flip, ::-1]
+    segments = segments.reshape(-1, 4)
+    return segments[np.lexsort(segments.T[::-1])]
+
+
+def contour_set_segments(cs):
+    """
+    This routine splits the lines of a ContourSet into segments, one array per level
+    """
+    result = []
+    for lines in cs.allsegs:
+        pairs = [np.stack([line[:-1], line[1:]], axis=1) for line in lines if len(line) > 1]
+        result.append(np.concatenate(pairs) if pairs else np.empty((0, 2, 2)))
+    return result
+
+
+@pytest.mark.parametrize("kind", ['smooth', 'masked', 'saddles'])
+def test_segments_match_contour(kind):
+    x, y, var = make_field(kind)
+    fig       = lib_gyc.gfigure()
+    ax        = fig.add_subplot()
+    # cells with a NaN corner are skipped, as plt.contour without corner masking
+    cs        = ax.contour(x, y, var, levels=7, corner_mask=False)
+    levels    = lib_gyc.contour_levels(7, np.nanmin(var), np.nanmax(var))
+    np.testing.assert_array_equal(levels, cs.levels)
+
+    lib_gyc.contour_segments_clear()
+    segments  = lib_gyc.contour_segments(x, y, var, levels)
+    assert len(segments) == len(levels)
+    for mine, reference in zip(segments, contour_set_segments(cs)):
+        assert len(mine) == len(reference)
+        np.testing.assert_allclose(canonical(mine), canonical(reference), atol=1e-9)
+
+
+def test_gcontourline_segments_levels_and_styles():
+    x, y, var = make_field('saddles')
+    fig       = lib_gyc.gfigure()
+    settings  = lib_gyc.gcontourline_style()
+    settings.update(levels=5, colors=['k', '#D20000'], linewidths=[1.0, 2.0])
+    cs        = lib_gyc.gcontourline(x, y, var, settings, ax=fig.add_subplot(1, 2, 1))
+    settings["engine"] = 'segments'
+    lc        = lib_gyc.gcontourline(x, y, var, settings, ax=fig.add_subplot(1, 2, 2))
+
+    # one path per level, styled per level as the ContourSet
+    assert len(lc.get_paths()) == len(cs.levels)
+    np.testing.assert_allclose(lc.get_colors(), cs.get_edgecolor())
+    np.testing.assert_allclose(lc.get_linewidths(), cs.get_linewidths())
+    for path, reference in zip(lc.get_paths(), contour_set_segments(cs)):
+        vertices = path.vertices.reshape(-1, 3, 2)[:, :2]
+        np.testing.assert_allclose(canonical(vertices), canonical(reference), atol=1e-9)
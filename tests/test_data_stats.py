@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lib_gyc
+
+
+def test_writable_array_modified_in_place():
+    y = np.zeros(10000)
+    assert lib_gyc.data_stats(y)["max"] == 0.0
+    y[5] = 7.0
+    assert lib_gyc.data_stats(y)["max"] == 7.0
+    assert not lib_gyc.is_constant(y)
+
+
+def test_read_only_array_is_cached():
+    y = np.arange(100.0)
+    y.flags.writeable = False
+    assert lib_gyc.data_stats(y) is lib_gyc.data_stats(y)
+
+
+def test_gplot_after_change_in_place():
+    x   = np.linspace(0.0, 1.0, 10000)
+    y   = np.zeros(10000)
+    fig = lib_gyc.gfigure()
+    ax  = fig.add_subplot()
+    lib_gyc.data_stats(y)
+    y[5] = 7.0
+    lib_gyc.gplot(x, y, ax=ax)
+    assert ax.get_ylim()[1] == pytest.approx(7.0)
+
+
+def test_gcontour_after_change_in_place():
+    x   = np.linspace(0.0, 1.0, 512)
+    var = np.zeros((512, 512))
+    var[0, 0] = 1.0
+    fig = lib_gyc.gfigure()
+    pcm = lib_gyc.gcontour(x, x, var, ax=fig.add_subplot())
+    assert pcm.get_clim() == (0.0, 1.0)
+    var[100, 100] = 5.0
+    pcm = lib_gyc.gcontour(x, x, var, ax=fig.add_subplot())
+    assert pcm.get_clim() == (0.0, 5.0)
+
+
+def count_scans(monkeypatch):
+    calls   = []
+    compute = lib_gyc._compute_stats
+    monkeypatch.setattr(lib_gyc, '_compute_stats', lambda arr: calls.append(arr.shape) or compute(arr))
+    return calls
+
+
+def test_scope_scans_writable_array_once(monkeypatch):
+    calls = count_scans(monkeypatch)
+    y     = np.zeros(1000)
+    with lib_gyc.data_stats_scope():
+        assert lib_gyc.data_stats(y) is lib_gyc.data_stats(y)
+        with lib_gyc.data_stats_scope():
+            lib_gyc.data_stats(y)
+    assert len(calls) == 1
+    y[5] = 7.0
+    assert lib_gyc.data_stats(y)["max"] == 7.0
+    assert len(calls) == 2
+
+
+def test_gpanels_scans_each_field_once(monkeypatch):
+    x    = np.linspace(0.0, 1.0, 64)
+    X, Y = np.meshgrid(x, x)
+    u, v = np.sin(4.0 * X) * Y, np.cos(4.0 * X) * Y
+    fig  = lib_gyc.gfigure()
+    calls = count_scans(monkeypatch)
+    lib_gyc.gpanels('gcontour', [(X, Y, u), (X, Y, v)], fig=fig)
+    # X, Y, u and v: one scan each for the shared limits and the drawings
+    assert len(calls) == 4
@@ -0,0 +1,73 @@
+import os
+import sys
+import numpy as np
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lib_gyc
+
+
+def make_points(seed=0, num=400):
+    rng  = np.random.default_rng(seed)
+    x, y = rng.uniform(0.0, 1.0, num), rng.uniform(0.0, 1.0, num)
+    return x, y, np.sin(6.0 * x) * np.cos(4.0 * y)
+
+
+def render(draw):
+    fig = lib_gyc.gfigure(figsize=(4, 3), dpi=80)
+    ax  = fig.add_axes([0, 0, 1, 1])
+    draw(ax)
+    ax.set_xlim(0.0, 1.0)
+    ax.set_ylim(0.0, 1.0)
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+
+def test_cached_triangulation_renders_as_tricontourf():
+    x, y, var = make_points()
+    levels    = np.linspace(var.min(), var.max(), 12)
+    reference = render(lambda ax: ax.tricontourf(x, y, var, levels=levels))
+
+    lib_gyc.gmesh_clear()
+    tri       = lib_gyc.gtriangulation(x, y)
+    assert lib_gyc.gtriangulation(x, y) is tri
+    for _ in range(2):
+        image = render(lambda ax: ax.tricontourf(lib_gyc.gtriangulation(x, y), var, levels=levels))
+        np.testing.assert_array_equal(image, reference)
+
+
+def test_gcontour_scattered_points_as_tricontourf():
+    x, y, var = make_points()
+    settings  = lib_gyc.gcontour_style()
+    settings.update(pcolor_contourf=1, show_colorbar=False)
+    lib_gyc.gmesh_clear()
+    # the second field of the same points is drawn on the cached triangulation
+    for field in (var, 2.0 * var):
+        fig = lib_gyc.gfigure()
+        cs  = lib_gyc.gcontour(x, y, field, settings, ax=fig.add_subplot())
+        ref = fig.add_subplot().tricontourf(x, y, field, levels=cs.levels)
+        assert len(cs.get_paths()) == len(ref.get_paths())
+        for path, path_ref in zip(cs.get_paths(), ref.get_paths()):
+            np.testing.assert_array_equal(path.vertices, path_ref.vertices)
+
+
+def test_triangulation_cache_follows_the_coordinates():
+    x, y, _ = make_points()
+    lib_gyc.gmesh_clear()
+    tri     = lib_gyc.gtriangulation(x, y)
+
+    # same buffer, values changed in place
+    x[::7] += 0.01
+    moved   = lib_gyc.gtriangulation(x, y)
+    assert moved is not tri
+    np.testing.assert_array_equal(moved.x, x)
+    assert lib_gyc.gtriangulation(x, y) is moved
+
+    # other coordinates, then the first ones again
+    x2, y2, _ = make_points(seed=1)
+    other   = lib_gyc.gtriangulation(x2, y2)
+    assert other is not moved
+    np.testing.assert_array_equal(other.x, x2)
+    assert lib_gyc.gtriangulation(x, y) is moved
+
+    lib_gyc.gmesh_clear()
+    assert lib_gyc.gtriangulation(x, y) is not moved
@@ -0,0 +1,32 @@
+import os
+import sys
+import numpy as np
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lib_gyc
+import matplotlib.pyplot as plt
+
+
+def test_template_save_keeps_current_figure(tmp_path):
+    x, y = np.linspace(0.0, 1.0, 32), np.linspace(0.0, 1.0, 24)
+    var  = np.sin(6.0 * x)[None, :] * np.cos(4.0 * y)[:, None]
+    template = lib_gyc.gcontour_template(x, y, var)
+    current  = plt.figure()
+    template.update(2.0 * var)
+    template.save(str(tmp_path / 'frame'), dpi=50)
+    assert os.path.exists(str(tmp_path / 'frame.png'))
+    assert plt.gcf() is current
+    plt.close('all')
+
+
+def test_blit_save_with_gfigure(tmp_path):
+    fig     = lib_gyc.gfigure(figsize=(4, 3))
+    ax      = fig.add_subplot()
+    line,   = ax.plot([0.0, 1.0], [0.0, 1.0])
+    current = plt.figure()
+    blit    = lib_gyc.GBlit(fig, [line])
+    blit.save(str(tmp_path / 'blit'), dpi=50)
+    assert os.path.exists(str(tmp_path / 'blit.png'))
+    assert plt.gcf() is current
+    assert line.get_animated()
+    plt.close('all')
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lib_gyc
+
+
+def test_stream_with_gaps():
+    plt = lib_gyc.plt
+    fig = plt.figure()
+    try:
+        stream = lib_gyc.gplot_stream(np.arange(10.0), np.linspace(0.0, 1.0, 10))
+        # a chunk with a gap, then a chunk of gaps only, then samples out of range
+        stream.append(np.arange(10.0, 20.0), np.r_[np.full(5, np.nan), np.linspace(1.0, 3.0, 5)])
+        assert stream.ax.get_ylim()[1] >= 3.0
+        stream.append(np.arange(20.0, 25.0), np.full(5, np.nan))
+        stream.append(np.arange(25.0, 30.0), np.linspace(-4.0, 6.0, 5))
+        ymin, ymax = stream.ax.get_ylim()
+        xmin, xmax = stream.ax.get_xlim()
+        assert ymin <= -4.0 and ymax >= 6.0
+        assert xmax >= 29.0
+        assert np.isnan(stream.y).sum() == 10
+    finally:
+        plt.close(fig)
+
+
+def test_stream_on_given_axes():
+    plt     = lib_gyc.plt
+    current = plt.figure()
+    try:
+        fig    = lib_gyc.gfigure()
+        ax     = fig.add_subplot()
+        stream = lib_gyc.gplot_stream(np.arange(10.0), np.linspace(0.0, 1.0, 10), ax=ax)
+        stream.append(np.arange(10.0, 20.0), np.linspace(1.0, 3.0, 10))
+        assert stream.ax is ax and len(ax.lines) == 1
+        assert ax.get_ylim()[1] >= 3.0
+
+        ax     = fig.add_subplot(2, 1, 2)
+        curve  = lib_gyc.gplot_interactive(np.arange(10.0), np.linspace(0.0, 1.0, 10), ax=ax)
+        curve.update(np.arange(10.0), np.linspace(0.0, 2.0, 10))
+        assert curve.ax is ax and len(ax.lines) == 1
+        assert not current.axes
+        assert plt.gcf() is current
+    finally:
+        plt.close('all')
@@ -0,0 +1,25 @@
+import os
+import sys
+import numpy as np
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import lib_gyc
+
+
+def test_style_with_array_values():
+    settings = lib_gyc.gcontour_style()
+    settings["bar_position_size"] = np.array([0.8, 0.1, 0.05, 0.7])
+    style = lib_gyc.GContourStyle(settings)
+    assert style == lib_gyc.GContourStyle(settings)
+    assert style != lib_gyc.GContourStyle()
+    assert style != style.derive(bar_position_size=np.array([0.8, 0.1, 0.05, 0.6]))
+    assert "bar_position_size=array(" in repr(style)
+    assert repr(lib_gyc.GContourStyle()) == "GContourStyle()"
+
+
+def test_style_ignores_unknown_keys(capsys, monkeypatch):
+    monkeypatch.setattr(lib_gyc, "_GSTYLE_UNKNOWN", set())    # the warning is printed once per key
+    settings = lib_gyc.gplot_style()
+    settings['line']["linestyle"] = '--'
+    assert lib_gyc.GPlotStyle(settings) == lib_gyc.GPlotStyle()
+    assert "['line']['linestyle']" in capsys.readouterr().out
@@ -0,0 +1,121 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lib_gyc
+
+# the ends of lines lying exactly on half pixels (spines, ticks) may be snapped one pixel apart,
+# since the offset of a tile changes the rounding errors of their transforms: a few pixels differ
+# fully, the rest of the output must match
+MAX_SHARE = 1e-4    # share of the pixels differing by more than 8 (over 255)
+MAX_MEAN  = 0.01    # mean difference of the channels (over 255)
+# lines are clipped to the tile before the renderer simplifies them, so the vertices kept by the
+# simplification (within 1/9 pixel) change near the edges of the tiles and the edge pixels of long lines differ
+MAX_SHARE_LINES = 2e-3
+MAX_MEAN_LINES  = 0.05
+
+
+def make_job(directory, name):
+    num  = 200
+    x    = np.linspace(-4.0, 4.0, num)
+    X, Y = np.meshgrid(x, x)
+    np.save(os.path.join(directory, 'x.npy'), X + 0.2 * np.sin(Y))
+    np.save(os.path.join(directory, 'y.npy'), Y)
+    np.save(os.path.join(directory, 'u.npy'), np.cos(X) * np.cos(Y))
+    settings = lib_gyc.gcontour_style()
+    settings.update(show_colorbar=True, shading='gouraud', downsample=None)
+    job = lib_gyc.gbatch_job()
+    job["filename"] = os.path.join(directory, name)
+    job["figsize"]  = (5, 4)
+    job["dpi"]      = 150
+    job["layers"]   = [lib_gyc.gbatch_layer('gcontour', tuple(os.path.join(directory, key + '.npy') for key in 'xyu'), settings)]
+    return job
+
+
+def make_plot_job(directory, name, num=2000):
+    x      = np.linspace(0.0, 1.0, num)
+    first  = lib_gyc.gplot_style()
+    first['line']["label"]  = 'sin'
+    second = lib_gyc.gplot_style()
+    second['line'].update(label='cos', color='#D20000', marker='o', markevery=num // 20)
+    job = lib_gyc.gbatch_job()
+    job["filename"] = os.path.join(directory, name)
+    job["figsize"]  = (5, 4)
+    job["dpi"]      = 150
+    job["layers"]   = [lib_gyc.gbatch_layer('gplot', (x, np.sin(8.0 * x)), first),
+                       lib_gyc.gbatch_layer('gplot', (x, np.cos(5.0 * x)**2), second)]
+    return job
+
+
+def read_png(filename):
+    image = lib_gyc.mpl.image.imread(filename)
+    return np.round(image * 255).astype(int)
+
+
+@pytest.mark.parametrize("tiles, processes", [((2, 2), 1), ((3, 2), 1), ((1, 5), 1), ((3, 1), 2)])
+def test_tiled_matches_single_pass(tmp_path, tiles, processes):
+    job = make_job(str(tmp_path), 'single')
+    assert lib_gyc._gbatch_render(job) == 'ok'
+    single = read_png(job["filename"] + '.png')
+
+    job["filename"] = os.path.join(str(tmp_path), 'tiled')
+    lib_gyc.gsavefig_tiled(job, tiles=tiles, processes=processes, verbose=False)
+    tiled = read_png(job["filename"] + '.png')
+
+    assert tiled.shape == single.shape
+    diff = np.abs(tiled - single).max(axis=-1)
+    assert (diff > 8).mean() <= MAX_SHARE
+    assert np.abs(tiled - single).mean() <= MAX_MEAN
+
+
+@pytest.mark.parametrize("tiles", [(2, 2), (3, 2), (1, 5)])
+@pytest.mark.parametrize("num", [200, 2000])
+def test_tiled_plot_matches_single_pass(tmp_path, tiles, num):
+    job = make_plot_job(str(tmp_path), 'single', num)
+    for simplify in (True, False):
+        with lib_gyc.mpl.rc_context({'path.simplify': simplify}):
+            job["filename"] = os.path.join(str(tmp_path), 'single')
+            assert lib_gyc._gbatch_render(job) == 'ok'
+            single = read_png(job["filename"] + '.png')
+            job["filename"] = os.path.join(str(tmp_path), 'tiled')
+            lib_gyc.gsavefig_tiled(job, tiles=tiles, processes=1, verbose=False)
+            tiled = read_png(job["filename"] + '.png')
+
+        assert tiled.shape == single.shape
+        diff = np.abs(tiled - single).max(axis=-1)
+        if simplify:
+            assert (diff > 8).mean() <= MAX_SHARE_LINES
+            assert np.abs(tiled - single).mean() <= MAX_MEAN_LINES
+        else:
+            # the legend at the 'best' location, the markers and the lines match
+            assert (diff > 8).mean() <= MAX_SHARE
+            assert np.abs(tiled - single).mean() <= MAX_MEAN
+
+
+def test_tiled_keeps_the_drawing_order(tmp_path):
+    # a contourf drawn over a mesh has the same zorder: the tile of the mesh must stay below it
+    x    = np.linspace(0.0, 1.0, 60)
+    X, Y = np.meshgrid(x, x)
+    mesh = lib_gyc.gcontour_style()
+    mesh.update(shading='gouraud', show_colorbar=False)
+    over = lib_gyc.gcontour_style()
+    over.update(pcolor_contourf=1, show_colorbar=False, cmap='gray')
+    xs   = np.linspace(0.3, 0.7, 30)
+    job  = lib_gyc.gbatch_job()
+    job["filename"] = os.path.join(str(tmp_path), 'single')
+    job["figsize"]  = (5, 4)
+    job["dpi"]      = 150
+    job["layers"]   = [lib_gyc.gbatch_layer('gcontour', (X + 0.05 * np.sin(3.0 * Y), Y, np.cos(4.0 * X) * np.sin(3.0 * Y)), mesh),
+                       lib_gyc.gbatch_layer('gcontour', (xs, xs, np.add.outer(xs, xs)), over)]
+    assert lib_gyc._gbatch_render(job) == 'ok'
+    single = read_png(job["filename"] + '.png')
+
+    job["filename"] = os.path.join(str(tmp_path), 'tiled')
+    lib_gyc.gsavefig_tiled(job, tiles=(2, 2), processes=1, verbose=False)
+    tiled = read_png(job["filename"] + '.png')
+    assert (np.abs(tiled - single).max(axis=-1) > 8).mean() <= MAX_SHARE